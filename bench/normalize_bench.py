@@ -0,0 +1,115 @@
+# bench/normalize_bench.py
+# normalize_numeric_columns vs the pre-vectorization implementation (kept below as
+# normalize_legacy, the reference for the output schema).
+#   python -m bench.normalize_bench --rows 10000 100000 [--distinct 0.3]
+# Rows are built from the stand-in's Cena / Platiba texts plus edge cases (missing
+# values, "ha." / "m²" units, comma decimals, non-breaking spaces, listing-style
+# "25,000" / "1,200" thousands separators); --distinct is the share of distinct ads
+# (the rest repeat, as in snapshot histories). Both outputs
+# must be identical (values, dtypes, column order) before anything is timed.
+
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from zeme.scraper import normalize_numeric_columns
+
+from .server import StandInSite
+
+EDGE_CASES = [
+    ("25 000 € (20.83 €/m²)", "1200 m²"), (None, None), ("NA", "NA"), ("Maiņai", "1,5 ha."),
+    ("25\xa0000 €", " 3.2 HA "), ("(20 €/m²)", "12 m ²"), ("€", "ha"), ("1 200 €/mēn.", "0,75 ha"),
+    ("12 345 € (1,5 €/m²)", "800"), ("", ""), ("25,000  €", "1,200"), ("1,250,000 €", "1\xa0200 m²"),
+]
+
+def normalize_legacy(df: pd.DataFrame) -> pd.DataFrame:
+    # --- Price split ---
+    # (thousands separators - "25,000", NBSP - as in zeme.scraper._amount)
+    df["Cena"] = df["Cena"].fillna("NA").astype(str).str.replace("\xa0", " ", regex=False)
+    df["Cena EUR"] = (
+        df["Cena"].str.extract(r"(\d[\d\s,.]*?)\s*€", expand=False)
+        .str.replace(r"\s+", "", regex=True)
+        .str.replace(r"(?<=\d)[,.](?=\d{3}(?!\d))", "", regex=True)
+        .str.replace(",", ".", regex=False)
+    )
+    df["Cena m2"] = (
+        df["Cena"].str.extract(r"\(([\d\.,\s]+)\s*€/m²\)", expand=False)
+        .str.replace(r"\s+", "", regex=True)
+        .str.replace(",", ".", regex=False)
+    )
+
+    # --- Area split ---
+    df["Platiba"] = df["Platiba"].fillna("NA").astype(str).str.replace("\xa0", " ", regex=False)
+    plat_split = df["Platiba"].str.extract(r"(\d[\d\s,.]*)(.*)")
+    in_ha = plat_split[1].str.strip().str.lower().str.replace(".", "", regex=False).str.replace(r"\s+", "", regex=True).eq("ha")
+    amount = plat_split[0].str.replace(r"\s+", "", regex=True)
+    df["Platiba Daudzums"] = (
+        amount.where(in_ha, amount.str.replace(r"(?<=\d)[,.](?=\d{3}(?!\d))", "", regex=True))
+        .str.replace(",", ".", regex=False)
+    )
+    df["Platiba Mervieniba"] = plat_split[1].fillna("")
+
+    # Convert numerics
+    for col in ["Cena EUR", "Cena m2", "Platiba Daudzums"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    # --- Normalized area columns in m2 and ha ---
+    unit = (
+        df['Platiba Mervieniba']
+        .fillna('')
+        .str.strip()
+        .str.lower()
+        .str.replace('.', '', regex=False)
+        .str.replace(r'\s+', '', regex=True)
+        .str.replace('m²', 'm2', regex=False)
+    )
+    amt = df['Platiba Daudzums']  # already numeric
+    is_ha = unit.eq('ha')
+
+    df['Platiba m2'] = amt.where(~is_ha, amt * 10000)
+    df['Platiba ha'] = amt.where(is_ha,  amt / 10000)
+
+    # Drop raw text columns if you don't need them
+    return df.drop(columns=["Platiba", "Cena"], errors="ignore")
+
+def make_frame(rows, distinct, seed=0):
+    site = StandInSite(n_ads=max(1, int(rows * distinct)), seed=seed)
+    texts = [(a["price_text"], a["area_text"]) for a in
+             (site.ad(t, k) for t in range(len(site.targets)) for k in range(site.ads_per_target[t]))]
+    texts += EDGE_CASES
+    rng = random.Random(seed)
+    picked = texts + [rng.choice(texts) for _ in range(rows - len(texts))]
+    return pd.DataFrame({"Link": [f"ad{i}" for i in range(len(picked))],
+                         "Cena": [c for c, _ in picked], "Platiba": [p for _, p in picked]})
+
+def best_of(func, frame, repeat):
+    best = None
+    for _ in range(repeat):
+        df = frame.copy()
+        t0 = time.perf_counter()
+        func(df)
+        seconds = time.perf_counter() - t0
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m bench.normalize_bench",
+                                 description="normalize_numeric_columns vs the legacy implementation.")
+    ap.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    ap.add_argument("--distinct", type=float, default=0.3, help="share of distinct ads among the rows")
+    ap.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    args = ap.parse_args(argv)
+
+    print(f"{'rows':>8} {'distinct':>8} {'legacy rows/s':>14} {'current rows/s':>15} {'speedup':>8}")
+    for rows in args.rows:
+        frame = make_frame(rows, args.distinct)
+        pd.testing.assert_frame_equal(normalize_numeric_columns(frame.copy()), normalize_legacy(frame.copy()))
+        legacy = best_of(normalize_legacy, frame, args.repeat)
+        current = best_of(normalize_numeric_columns, frame, args.repeat)
+        print(f"{len(frame):>8} {args.distinct:>8.0%} {len(frame) / legacy:>14,.0f} "
+              f"{len(frame) / current:>15,.0f} {legacy / current:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
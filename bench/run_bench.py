@@ -0,0 +1,158 @@
+# bench/run_bench.py
+# Offline scraper benchmarks against the local ss.lv stand-in (bench/server.py).
+#   python -m bench.run_bench --scale 1000 10000 [--latency 0.02] [--p429 0.01]
+# Per scale it times
+#   phase1_discover_inventory    regions, subregions, pagination (+ first-page rows)
+#   collect_ad_links_from_pages  remaining listing pages -> unique ad links
+#   parse_ad_details             fetch + parse --ad-sample ads (the phase 2 pipeline)
+#   parse_ad_html                parse only, the same pages from memory (CPU bound)
+#   normalize_numeric_columns    all `scale` detail rows
+# Results are appended to bench/results/results.jsonl, tagged with the git commit,
+# and compared with the latest earlier commit measured under the same settings.
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from zeme import scraper
+from zeme.ratelimit import RateLimitedAdapter
+
+from .server import StandInSite
+
+RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "results.jsonl")
+SETTINGS = ("scale", "latency", "p429", "rps", "ad_sample", "parse_workers")
+
+def git_commit():
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True).stdout.strip()
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def configure_scraper(site, rps, parse_workers):
+    """Point zeme.scraper at the stand-in: no cache, no checkpoints / indexes, http mounted."""
+    scraper.BASE = site.base
+    scraper.VERBOSE = False
+    scraper.HTTP_CACHE_DIR = None
+    scraper.LAND_TYPE_INDEX = None
+    scraper.SEEN_INDEX = None
+    scraper.PARSE_WORKERS = parse_workers
+    limiter = scraper.RATE_LIMITER
+    limiter.rate = limiter.max_rate = float(rps)
+    limiter.burst = max(limiter.burst, rps / 10)
+    scraper._SESSION = None
+    s = scraper.sess()
+    s.mount("http://", RateLimitedAdapter(max_retries=scraper._make_retry(),
+                                          pool_maxsize=max(10, scraper.AD_CONCURRENCY), limiter=limiter))
+    scraper.METRICS.reset()
+
+def timed(results, name, items, func, *args):
+    t0 = time.perf_counter()
+    out = func(*args)
+    seconds = time.perf_counter() - t0
+    results.append({"bench": name, "items": items(out) if callable(items) else items,
+                    "seconds": round(seconds, 4)})
+    return out
+
+def run_scale(scale, args):
+    site = StandInSite(n_ads=scale, regions=args.regions, subregions=args.subregions,
+                       latency=args.latency, p429=args.p429, retry_after=args.retry_after).start()
+    try:
+        configure_scraper(site, args.rps, args.parse_workers)
+        results = []
+        _, _, listing_pages = timed(results, "phase1_discover_inventory", lambda r: len(r[2]),
+                                    scraper.phase1_discover_inventory, site.root)
+        links = timed(results, "collect_ad_links_from_pages", len,
+                      scraper.collect_ad_links_from_pages, listing_pages)
+        if len(links) != scale:
+            print(f"[WARN] scale {scale}: collected {len(links)} ad links", file=sys.stderr)
+
+        sample = links[:args.ad_sample]
+        details = timed(results, "parse_ad_details", len, scraper.fetch_ad_details, sample)
+        pages = [(url, site.render(url[len(site.base):])[2]) for url in sample]
+        timed(results, "parse_ad_html", len(pages),
+              lambda: [scraper.parse_ad_html(url, html) for url, html in pages])
+
+        rows = (details * (scale // max(1, len(details)) + 1))[:scale]
+        frame = pd.DataFrame(rows)
+        timed(results, "normalize_numeric_columns", len(frame),
+              scraper.normalize_numeric_columns, frame)
+
+        counters = scraper.METRICS.report()["counters"]
+        extra = {"requests": site.requests, "injected_429": site.throttled,
+                 "retries": counters.get("retries", 0)}
+    finally:
+        site.stop()
+
+    meta = {"commit": args.commit, "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "scale": scale, "latency": args.latency,
+            "p429": args.p429, "rps": args.rps, "ad_sample": args.ad_sample,
+            "parse_workers": args.parse_workers, **extra}
+    for r in results:
+        r["per_s"] = round(r["items"] / r["seconds"], 1) if r["seconds"] else None
+    return [{**meta, **r} for r in results]
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def baseline_for(row, history):
+    """Latest earlier result of the same bench + settings from another commit."""
+    same = [h for h in history if h["bench"] == row["bench"] and h["commit"] != row["commit"]
+            and all(h.get(k) == row[k] for k in SETTINGS)]
+    return same[-1] if same else None
+
+def report(rows, history):
+    print(f"{'scale':>7} {'bench':<28} {'items':>7} {'seconds':>9} {'items/s':>10}  vs baseline")
+    for row in rows:
+        base = baseline_for(row, history)
+        delta = ""
+        if base and base["seconds"]:
+            change = row["seconds"] / base["seconds"] - 1
+            delta = f"{change:+.0%} ({base['commit']})" + ("  <-- slower" if change > 0.10 else "")
+        per_s = f"{row['per_s']:.1f}" if row["per_s"] is not None else "-"
+        print(f"{row['scale']:>7} {row['bench']:<28} {row['items']:>7} {row['seconds']:>9.3f} {per_s:>10}  {delta}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m bench.run_bench",
+                                 description="Offline scraper benchmarks against a local ss.lv stand-in.")
+    ap.add_argument("--scale", type=int, nargs="+", default=[1000], help="ads in the inventory (e.g. 1000 10000 100000)")
+    ap.add_argument("--regions", type=int, default=6)
+    ap.add_argument("--subregions", type=int, default=4)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    ap.add_argument("--p429", type=float, default=0.0, help="share of requests answered with 429")
+    ap.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds on injected 429s")
+    ap.add_argument("--rps", type=float, default=500.0, help="rate limiter start/max rate")
+    ap.add_argument("--ad-sample", type=int, default=2000, help="ads fetched + parsed per scale")
+    ap.add_argument("--parse-workers", type=int, default=scraper.PARSE_WORKERS)
+    ap.add_argument("--out", default=RESULTS, help="results file (JSON lines)")
+    ap.add_argument("--no-save", action="store_true", help="print only")
+    args = ap.parse_args(argv)
+    args.commit = git_commit()
+
+    history = load_history(args.out)
+    rows = []
+    for scale in args.scale:
+        rows += run_scale(scale, args)
+    report(rows, history)
+    if not args.no_save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        print(f"Saved {len(rows)} results to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# bench/server.py
+# Local ss.lv stand-in for offline benchmarks.
+# Serves the fixture pages (bench/fixtures/*.html, ss.lv markup) for a synthetic
+# inventory of n_ads ads spread over regions / subregions:
+#   /lv/real-estate/plots-and-lands/                       root (region links)
+#   /lv/real-estate/plots-and-lands/<region>/              region (subregion links)
+#   /lv/real-estate/plots-and-lands/<region>[/<sub>]/sell/ listing pages (+ pageN.html,
+#                                                          pager window, 302 past the end)
+#   /msg/lv/real-estate/plots-and-lands/<...>/<ad>.html    ad pages
+# Every page is a pure function of (seed, path), so runs are repeatable.
+# latency: seconds added to every response; p429: share of requests answered with
+# 429 + Retry-After (before latency), to exercise the rate limiter and retries.
+
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PREFIX   = "/lv/real-estate/plots-and-lands/"
+
+REGION_NAMES = [
+    ("jurmala", "Jūrmala"), ("riga-region", "Rīgas rajons"), ("ogre-and-reg", "Ogre un raj."),
+    ("jelgava-and-reg", "Jelgava un raj."), ("dobele-and-reg", "Dobele un raj."),
+    ("tukums-and-reg", "Tukums un raj."), ("cesis-and-reg", "Cēsis un raj."),
+    ("talsi-and-reg", "Talsi un raj."), ("bauska-and-reg", "Bauska un raj."),
+    ("liepaja-and-reg", "Liepāja un raj."),
+]
+ZEMES_TIPS = [
+    "Zemes gabals ciemata", "Zeme privātmājas būvēšanai", "Vasarnīcas zemes gabals, dārzs",
+    "Lauksaimniecības zeme", "Mežs", "Komercdarbības apbūves zeme",
+]
+WORDS = ("Pārdod zemes gabalu klusā vietā netālu no meža un ūdenstilpnes, "
+         "elektrība pie robežas, piebraucamais ceļš visu gadu, iespējama apbūve").split()
+
+def _template(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+class StandInSite:
+    def __init__(self, n_ads=1000, regions=6, subregions=4, per_page=30, pager_window=10,
+                 latency=0.0, p429=0.0, retry_after=1, seed=0):
+        self.n_ads = n_ads
+        self.per_page = per_page
+        self.pager_window = pager_window
+        self.latency = latency
+        self.p429 = p429
+        self.retry_after = retry_after
+        self.seed = seed
+        self.templates = {name[:-5]: _template(name) for name in os.listdir(FIXTURES) if name.endswith(".html")}
+
+        # Region 0 has no subregions (its listings hang off the region itself)
+        self.regions = [REGION_NAMES[i] if i < len(REGION_NAMES) else (f"region{i}-and-reg", f"Region{i} un raj.")
+                        for i in range(regions)]
+        self.subregions = {slug: [] if i == 0 else [(f"{slug.split('-')[0]}{j}-pag", f"{name.split()[0]}{j} pag.")
+                                                     for j in range(subregions)]
+                           for i, (slug, name) in enumerate(self.regions)}
+        self.targets = []  # (path under PREFIX, region name, pagasts)
+        for slug, name in self.regions:
+            for sub, sub_name in self.subregions[slug] or [(None, name)]:
+                self.targets.append((f"{slug}/{sub}" if sub else slug, name, sub_name))
+        self.target_index = {path: i for i, (path, _, _) in enumerate(self.targets)}
+        base, extra = divmod(n_ads, len(self.targets))
+        self.ads_per_target = [base + (t < extra) for t in range(len(self.targets))]
+
+        self.requests = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._server = None
+
+    # ---------- inventory ----------
+    def pages(self, t):
+        return max(1, -(-self.ads_per_target[t] // self.per_page))
+
+    def ad(self, t, k):
+        """Deterministic attributes of ad k of target t."""
+        rng = random.Random(f"{self.seed}-{t}-{k}")
+        path, region, pagasts = self.targets[t]
+        ad_id = t * 10_000_000 + k
+        in_ha = rng.random() < 0.2
+        area = round(rng.uniform(0.5, 30), 1) if in_ha else rng.randrange(400, 6000, 10)
+        m2 = area * 10000 if in_ha else area
+        per_m2 = round(rng.uniform(1, 60), 2)
+        price = int(m2 * per_m2)
+        return {
+            "ad_id": ad_id,
+            "href": f"/msg{PREFIX}{path}/ad{ad_id}.html",
+            "region": region,
+            "pagasts": pagasts,
+            "ciems": f"Ciems{rng.randrange(20)}",
+            "iela": f"Iela {rng.randrange(1, 200)}",
+            # listing cells as ss.lv lists them: "1,200" (m² column), "25,000  €";
+            # every 20th ad lists no number ("maiņai"), so the ad page must supply it
+            "area": f"{area} ha" if in_ha else f"{area:,}",
+            "area_text": f"{area} ha" if in_ha else f"{area} m²",
+            "price": "maiņai" if (t + k) % 20 == 19 else f"{price:,}",
+            "price_text": f"{price:,} € ({per_m2} €/m²)".replace(",", " "),
+            "zemes_tips": rng.choice(ZEMES_TIPS),
+            "kadastrs": f"{rng.randrange(10**10, 10**11)}",
+            "datums": f"{rng.randrange(1, 29):02d}.{rng.randrange(1, 13):02d}.2024 {rng.randrange(24):02d}:{rng.randrange(60):02d}",
+            "description": " ".join(rng.choice(WORDS) for _ in range(rng.randrange(30, 120))),
+        }
+
+    def ad_links(self, base=""):
+        return [base + self.ad(t, k)["href"] for t in range(len(self.targets))
+                for k in range(self.ads_per_target[t])]
+
+    # ---------- pages ----------
+    def _links(self, items):
+        return "\n".join(self.templates["category_link"].format(href=href, name=name, count=count)
+                         for href, name, count in items)
+
+    def render(self, path):
+        """-> (status, headers, body) for a request path."""
+        if path == PREFIX:
+            items = [(f"{PREFIX}{slug}/", name, 0) for slug, name in self.regions]
+            return 200, {}, self.templates["root"].format(links=self._links(items))
+
+        m = re.fullmatch(re.escape(PREFIX) + r"([^/]+)/", path)
+        if m and m.group(1) in self.subregions:
+            slug = m.group(1)
+            name = dict(self.regions)[slug]
+            items = [(f"{PREFIX}{slug}/{sub}/", sub_name, 0) for sub, sub_name in self.subregions[slug]]
+            return 200, {}, self.templates["category"].format(title=name, links=self._links(items),
+                                                              sell=f"{PREFIX}{slug}/sell/")
+
+        m = re.fullmatch(re.escape(PREFIX) + r"(.+)/sell/(?:page(\d+)\.html)?", path)
+        if m and m.group(1) in self.target_index:
+            t = self.target_index[m.group(1)]
+            sell = f"{PREFIX}{m.group(1)}/sell/"
+            page, last = int(m.group(2) or 1), self.pages(t)
+            if page > last:
+                return 302, {"Location": sell}, ""
+            first = (page - 1) * self.per_page
+            rows = "\n".join(self.templates["sell_row"].format(**self.ad(t, k))
+                             for k in range(first, min(first + self.per_page, self.ads_per_target[t])))
+            nav = [n for n in range(max(1, page - self.pager_window), min(last, page + self.pager_window) + 1)]
+            pager = " ".join(f'<a class="navi" href="{sell if n == 1 else f"{sell}page{n}.html"}">{n}</a>'
+                             for n in nav if n != page)
+            return 200, {}, self.templates["sell"].format(title=self.targets[t][1], page=page,
+                                                          rows=rows, pager=pager)
+
+        m = re.fullmatch(r"/msg" + re.escape(PREFIX) + r"(.+)/ad(\d+)\.html", path)
+        if m and m.group(1) in self.target_index:
+            t, k = divmod(int(m.group(2)), 10_000_000)
+            if t == self.target_index[m.group(1)] and k < self.ads_per_target[t]:
+                return 200, {}, self.templates["ad"].format(**self.ad(t, k))
+        return 404, {}, "<html><body>Not found</body></html>"
+
+    # ---------- HTTP ----------
+    def _handle(self, handler):
+        with self._lock:
+            self.requests += 1
+            throttle = self.p429 and self._rng.random() < self.p429
+            if throttle:
+                self.throttled += 1
+        if throttle:
+            status, headers, body = 429, {"Retry-After": str(self.retry_after)}, ""
+        else:
+            if self.latency:
+                time.sleep(self.latency)
+            status, headers, body = self.render(handler.path)
+        data = body.encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "text/html; charset=UTF-8")
+        handler.send_header("Content-Length", str(len(data)))
+        for key, value in headers.items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def start(self, host="127.0.0.1", port=0):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real site
+            disable_nagle_algorithm = True  # headers and body are separate writes
+
+            def do_GET(self):
+                site._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    @property
+    def base(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def root(self):
+        return self.base + PREFIX
@@ -1,339 +1,62 @@
 # ss_lv_plots_two_phase_FILTERED.py
-# Scrapes only selected regions & land types.
-# Keeps: Ciems (tdo_368), Pilseta/Pagasts (tdo_856), normalized area columns.
+# Scrapes only selected regions & land types (filters: Collection_filters.txt).
+# The two-phase scraper lives in the zeme package (zeme/scraper.py); this script
+# runs it for the filtered profile. To scrape this and other profiles in one pass:
+#   python -m zeme --profiles profiles.toml
 
 #%%
-import re
-import time
-from datetime import datetime
+import argparse
+import os
 
 import pandas as pd
-from bs4 import BeautifulSoup
 
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-
-BASE  = "https://www.ss.lv"
-ROOT  = f"{BASE}/lv/real-estate/plots-and-lands/"
+from zeme import Profile, RunCheckpoint, read_filters_file, run_profiles, write_snapshot
+from zeme.scraper import ROOT, VERBOSE
 
 # ---------- FILTERS ----------
-# Regions to include (URL slugs under /plots-and-lands/<slug>/ )
-ALLOWED_REGION_SLUGS = {
-    "riga-region",       # Rīgas rajons
-    "ogre-and-reg",      # Ogre un raj.
-    "jelgava-and-reg",   # Jelgava un raj.
-    "dobele-and-reg",    # Dobele un raj.
-    "tukums-and-reg",    # Tukums un raj.
-}
-
-# Land types to include (values from tdo_228 "Zemes Tips")
-ALLOWED_ZEMES_TIPS = {
-    "Zemes gabals ciemata",
-    "Zeme privātmājas būvēšanai",
-    "Vasarnīcas zemes gabals, dārzs",
-}
+# Land types (tdo_228 "Zemes Tips") and regions (names as on ss.lv, or URL slugs)
+FILTERS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Collection_filters.txt")
+PROFILE = Profile("filtered", **read_filters_file(FILTERS_FILE),
+                  tidy=True,                # strip "[Karte]" / "Datums:" noise
+                  require_price_area=True)  # drop rows missing price/area
 
 # Tunables
-LISTING_DELAY = 0.10
-AD_DELAY      = 0.10
-VERBOSE       = True
-
-#%%
-
-# -------------------------------
-# Robust session (lazy)
-# -------------------------------
-_SESSION = None
-def _make_retry():
-    try:  # urllib3 v2
-        return Retry(total=3, backoff_factor=0.5,
-                     status_forcelist=(429, 500, 502, 503, 504),
-                     allowed_methods=frozenset(["GET"]))
-    except TypeError:  # urllib3 v1
-        return Retry(total=3, backoff_factor=0.5,
-                     status_forcelist=(429, 500, 502, 503, 504),
-                     method_whitelist=frozenset(["GET"]))
-
-def sess():
-    global _SESSION
-    if _SESSION is None:
-        s = requests.Session()
-        s.headers.update({
-            "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                           "AppleWebKit/537.36 (KHTML, like Gecko) "
-                           "Chrome/123.0 Safari/537.36"),
-            "Accept-Language": "lv-LV,lv;q=0.9,en;q=0.8",
-        })
-        s.mount("https://", HTTPAdapter(max_retries=_make_retry()))
-        _SESSION = s
-    return _SESSION
-
-# -------------------------------
-# Helpers
-# -------------------------------
-def norm_cat(url: str) -> str:
-    if url.startswith("/"):
-        url = BASE + url
-    url = url.rstrip("/")
-    url = re.sub(r"/sell(?:/.*)?$", "", url)
-    return url + "/"
-
-def get_soup(url: str):
-    r = sess().get(url, timeout=30, allow_redirects=True)
-    r.raise_for_status()
-    return BeautifulSoup(r.text, "lxml"), r.url
-
-def listing_rows_from_html(html: str):
-    soup = BeautifulSoup(html, "lxml")
-    return [tr for tr in soup.find_all("tr") if tr.get("id", "").startswith("tr_")]
-
-def listing_rows(url: str):
-    r = sess().get(url, timeout=25, allow_redirects=True)
-    if r.status_code != 200:
-        return [], r.url
-    rows = [tr for tr in BeautifulSoup(r.text, "lxml").find_all("tr")
-            if tr.get("id", "").startswith("tr_")]
-    return rows, r.url
-
-def row_to_link(row):
-    tds = row.find_all("td")
-    if len(tds) < 3:
-        return None
-    a = tds[1].find("a", href=True)
-    if not a:
-        return None
-    return BASE + a["href"]
-
-def last_slug(url: str) -> str:
-    parts = norm_cat(url).strip("/").split("/")
-    return parts[-1] if parts else ""
+INCREMENTAL_FROM = None   # e.g. "df_zeme_filtered.csv"
+RUNS_DIR       = "runs_filtered"
+SCRAPE_MODE    = "full"          # "full" | "hybrid" (listing rows + ad pages when needed)
+SNAPSHOT_DIR   = None   # e.g. "snapshots_filtered"
+SNAPSHOT_BY_REGION = False
 
 #%%
-
-# ============================================================
-# PHASE 1: DISCOVERY (filtered to allowed regions)
-# ============================================================
-def discover_regions(root=ROOT):
-    soup, _ = get_soup(norm_cat(root))
-    regions = []
-    seen = set()
-    for a in soup.find_all("a", class_="a_category", href=True):
-        href = a["href"]
-        if not href.startswith("/lv/real-estate/plots-and-lands/"):
-            continue
-        url = norm_cat(href)
-        # immediate child of ROOT?
-        base_parts = norm_cat(root).strip("/").split("/")
-        url_parts  = url.strip("/").split("/")
-        if len(url_parts) == len(base_parts) + 1:
-            slug = last_slug(url)
-            if slug in ALLOWED_REGION_SLUGS and url not in seen:
-                regions.append(url); seen.add(url)
-    if VERBOSE:
-        print(f"[DISCOVERY] Allowed regions found: {len(regions)} -> {[last_slug(r) for r in regions]}")
-    return sorted(regions)
-
-def discover_subregions(region_url: str):
-    soup, _ = get_soup(norm_cat(region_url))
-    subs, seen = [], set()
-    for a in soup.find_all("a", class_="a_category", href=True):
-        href = a["href"]
-        if not href.startswith("/lv/real-estate/plots-and-lands/"):
-            continue
-        url = norm_cat(href)
-        base_parts = norm_cat(region_url).strip("/").split("/")
-        url_parts  = url.strip("/").split("/")
-        if len(url_parts) == len(base_parts) + 1:
-            if url not in seen:
-                subs.append(url); seen.add(url)
-    return sorted(subs)
-
-def discover_pagination_for_sell(sell_url: str, max_pages=300):
-    pages, page = [], 1
-    while page <= max_pages:
-        url = sell_url if page == 1 else f"{sell_url}page{page}.html"
-        rows, final_url = listing_rows(url)
-        if page > 1 and final_url.rstrip("/") != url.rstrip("/"):
-            break
-        if not rows:
-            break
-        pages.append(url)
-        page += 1
-        time.sleep(LISTING_DELAY)
-    return pages
-
-def phase1_discover_inventory(root=ROOT, include_region_if_no_subs=True):
-    regions = discover_regions(root)
-    subregions_by_region, listing_pages = {}, []
-
-    for reg in regions:
-        subs = discover_subregions(reg)
-        subregions_by_region[reg] = subs
-        targets = subs if subs else ([reg] if include_region_if_no_subs else [])
-        for target in targets:
-            sell_url = norm_cat(target) + "sell/"
-            pages = discover_pagination_for_sell(sell_url)
-            for p in pages:
-                listing_pages.append((target, p))
-            if VERBOSE:
-                print(f"[DISCOVERY] {target.replace(ROOT, '')}: pages={len(pages)}")
-
-    if VERBOSE:
-        total_pages = len(listing_pages)
-        total_subs  = sum(len(v) for v in subregions_by_region.values())
-        print(f"[SUMMARY] Regions={len(regions)}, Subregions={total_subs}, Listing pages={total_pages}")
-
-    return regions, subregions_by_region, listing_pages
-
-#%%
-
-# ============================================================
-# PHASE 2: SCRAPING
-# ============================================================
-def collect_ad_links_from_pages(listing_pages):
-    seen, all_links = set(), []
-    for idx, (_, page_url) in enumerate(listing_pages, start=1):
-        r = sess().get(page_url, timeout=25)
-        if r.status_code != 200:
-            if VERBOSE: print(f"[WARN] {r.status_code} on {page_url}")
-            continue
-        rows = listing_rows_from_html(r.text)
-        added = 0
-        for row in rows:
-            href = row_to_link(row)
-            if href and href not in seen:
-                seen.add(href); all_links.append(href); added += 1
-        if VERBOSE:
-            print(f"[LISTING {idx}/{len(listing_pages)}] +{added} links (unique total {len(all_links)})")
-        time.sleep(LISTING_DELAY)
-    return all_links
-
-def extract_text_by_id(soup, el_id, default="NA"):
-    el = soup.find(id=el_id)
-    return el.get_text(strip=True) if el else default
-
-def extract_datums(soup):
-    nodes = soup.find_all(string=re.compile(r"\bDatums:"))
-    if not nodes: return "NA"
-    node = nodes[0]
-    parent = node.parent.get_text(" ", strip=True) if getattr(node, "parent", None) else str(node)
-    m = re.search(r"(\d{2}\.\d{2}\.\d{4}\.|\d{4}-\d{2}-\d{2})", parent)
-    return m.group(1) if m else parent
-
-def parse_ad_details(url):
-    r = sess().get(url, timeout=30)
-    r.raise_for_status()
-    soup = BeautifulSoup(r.text, "lxml")
-    return {
-        "Link":               url,
-        "Pilseta":            extract_text_by_id(soup, "tdo_20"),
-        "Pilseta/Pagasts":    extract_text_by_id(soup, "tdo_856"),
-        "Iela":               extract_text_by_id(soup, "tdo_11"),
-        "Ciems":              extract_text_by_id(soup, "tdo_368"),
-        "Platiba":            extract_text_by_id(soup, "tdo_3"),
-        "Cena":               extract_text_by_id(soup, "tdo_8"),
-        "Zemes Tips":         extract_text_by_id(soup, "tdo_228"),
-        "Zemes Numurs":       extract_text_by_id(soup, "tdo_1631"),
-        "Datums":             extract_datums(soup),
-    }
-
-def normalize_numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
-    # Price split
-    df["Cena"] = df["Cena"].fillna("NA").astype(str)
-    df["Cena EUR"] = (
-        df["Cena"].str.extract(r"([\d\s]+)\s*€", expand=False)
-        .str.replace(" ", "", regex=False)
-    )
-    df["Cena m2"] = (
-        df["Cena"].str.extract(r"\(([\d\.,\s]+)\s*€/m²\)", expand=False)
-        .str.replace(" ", "", regex=False)
-        .str.replace(",", ".", regex=False)
-    )
-    # Area split
-    df["Platiba"] = df["Platiba"].fillna("NA").astype(str)
-    plat_split = df["Platiba"].str.extract(r"([\d\.,]+)\s*(.*)")
-    df["Platiba Daudzums"] = (
-        plat_split[0].str.replace(" ", "", regex=False).str.replace(",", ".", regex=False)
-    )
-    df["Platiba Mervieniba"] = plat_split[1].fillna("")
-    # Numerics
-    for col in ["Cena EUR", "Cena m2", "Platiba Daudzums"]:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-    # Normalized area columns
-    unit = (
-        df["Platiba Mervieniba"].fillna("").str.strip().str.lower()
-        .str.replace(".", "", regex=False).str.replace(r"\s+", "", regex=True)
-        .str.replace("m²", "m2", regex=False)
-    )
-    amt = df["Platiba Daudzums"]
-    is_ha = unit.eq("ha")
-    df["Platiba m2"] = amt.where(~is_ha, amt * 10000)
-    df["Platiba ha"] = amt.where(is_ha,  amt / 10000)
-    return df.drop(columns=["Platiba", "Cena"], errors="ignore")
-
-def tidy_text_columns(df: pd.DataFrame) -> pd.DataFrame:
-    # Clean small nuisances you had in your local post-steps
-    if "Iela" in df.columns:
-        df["Iela"] = df["Iela"].str.replace("[Karte]", "", case=False, regex=False)
-    if "Datums" in df.columns:
-        df["Datums"] = df["Datums"].str.replace("Datums:", "", case=False, regex=False).str.strip()
-    return df
-
-def filter_by_zemes_tips(df: pd.DataFrame) -> pd.DataFrame:
-    # Keep only selected land types
-    allowed_lower = {t.lower() for t in ALLOWED_ZEMES_TIPS}
-    return df[df["Zemes Tips"].fillna("").str.lower().isin(allowed_lower)]
-
-def phase2_scrape_inventory(listing_pages):
-    ad_links = collect_ad_links_from_pages(listing_pages)
-    if VERBOSE: print(f"[SCRAPE] Unique ad links: {len(ad_links)}")
-
-    details = []
-    for i, link in enumerate(ad_links, start=1):
-        try:
-            details.append(parse_ad_details(link))
-        except Exception as e:
-            print(f"[WARN] {i}/{len(ad_links)} failed: {link} -> {e}")
-        if VERBOSE and i % 50 == 0:
-            print(f"[SCRAPE] Parsed {i}/{len(ad_links)} ads")
-        time.sleep(AD_DELAY)
-
-    df = pd.DataFrame(details)
-    if df.empty:
-        return df
-
-    # Filter by desired Zemes Tips BEFORE heavy numeric processing
-    df = filter_by_zemes_tips(df)
-
-    df["Datu iev."] = datetime.today().strftime("%Y-%m-%d")
-    df = normalize_numeric_columns(df)
-    df = tidy_text_columns(df)
-    df = df.drop_duplicates(subset=["Link"]).reset_index(drop=True)
-
-    # Optional: drop rows missing price/area like in your local steps
-    df = df[df["Cena EUR"].notna()]
-    df = df[df["Platiba Daudzums"].notna()]
-    return df
-
-#%%
-
 # ============================================================
 # MAIN
 # ============================================================
-def run_two_phase_filtered(root=ROOT):
-    regions, subregions_by_region, listing_pages = phase1_discover_inventory(root)
-    df = phase2_scrape_inventory(listing_pages)
-    return df
+def run_two_phase_filtered(root=ROOT, snapshot=None, run=None, mode=None):
+    # mode: "full" or "hybrid" (default SCRAPE_MODE). Listing-only rows carry no Zemes Tips,
+    # so the land-type filter could not be applied -> "listing" raises ValueError.
+    frames = run_profiles([PROFILE], root, snapshots={PROFILE.name: snapshot},
+                          run=run, mode=mode or SCRAPE_MODE)
+    return frames[PROFILE.name]
 
 if __name__ == "__main__":
-    df_zeme = run_two_phase_filtered(ROOT)
+    ap = argparse.ArgumentParser(description="Scrape ss.lv plots & lands (filtered regions/types).")
+    ap.add_argument("--resume", metavar="RUN_ID", help=f"continue the checkpointed run {RUNS_DIR}/RUN_ID")
+    args, _ = ap.parse_known_args()
+    run = RunCheckpoint.resume(RUNS_DIR, args.resume) if args.resume else RunCheckpoint.create(RUNS_DIR)
+    if VERBOSE: print(f"[RUN] id={run.run_id} (resume with --resume {run.run_id})")
+
+    df_zeme = run_two_phase_filtered(ROOT, snapshot=INCREMENTAL_FROM, run=run)
     print(f"\nTotal filtered adverts scraped (unique): {len(df_zeme)}\n")
     with pd.option_context("display.max_columns", None, "display.width", 220):
         print(df_zeme.head(10).to_string(index=False))
 
+    if SNAPSHOT_DIR:
+        write_snapshot(df_zeme, SNAPSHOT_DIR, by_region=SNAPSHOT_BY_REGION)
+        print("Wrote snapshot:", SNAPSHOT_DIR)
+    run.finish()  # done: the checkpoint files are no longer needed
+
     # # Optional export:
-    # import os
+    # from datetime import datetime
     # os.makedirs("out", exist_ok=True)
     # out_path = f"out/ss_lv_FILTERED_{datetime.now():%Y-%m-%d}.csv"
     # df_zeme.to_csv(out_path, index=False)
@@ -1,3 +1,5 @@
+import os
+
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -9,11 +11,20 @@ try:
 except Exception:
     _HAS_PLOTLY = False
 
+from zeme.dashboard import AggregateCube, FilterIndex, PagedTable
+from zeme.dedup import dedupe
+
+DATA_PATH = "df_zeme_filtered.csv"
+NUMERIC_COLS = ["Cena EUR", "Cena m2", "Platiba Daudzums", "Platiba m2", "Platiba ha"]
+CATEGORICAL_COLS = ["Pilseta", "Pilseta/Pagasts", "Ciems", "Zemes Tips"]
+
 
 def _to_numeric_clean(s: pd.Series) -> pd.Series:
     """Convert strings like '12 345,67€' to numeric, return NaN on failure."""
     if s is None:
         return pd.Series(dtype=float)
+    if pd.api.types.is_numeric_dtype(s):
+        return s.astype(float)  # already typed (see _load_data): nothing to clean
     return pd.to_numeric(
         s.astype(str)
          .str.replace(r"[^0-9,\.\-]", "", regex=True)  # keep digits, comma, dot, minus
@@ -22,26 +33,6 @@ def _to_numeric_clean(s: pd.Series) -> pd.Series:
     )
 
 
-def _iqr_trim_mean(series: pd.Series) -> float:
-    """Mean after removing outliers via 1.5*IQR rule. Fallback to simple mean if all trimmed."""
-    if series is None:
-        return float("nan")
-    s = _to_numeric_clean(series).dropna()
-    if s.empty:
-        return float("nan")
-    q1 = s.quantile(0.25)
-    q3 = s.quantile(0.75)
-    iqr = q3 - q1
-    if iqr == 0:
-        return float(s.mean())
-    lower = q1 - 1.5 * iqr
-    upper = q3 + 1.5 * iqr
-    s_trim = s[(s >= lower) & (s <= upper)]
-    if s_trim.empty:
-        return float(s.mean())
-    return float(s_trim.mean())
-
-
 def _derive_size_m2(df: pd.DataFrame) -> pd.Series:
     """Return a size series in m². Use 'Platiba m2' if present; otherwise derive from
     'Platiba Daudzums' + 'Platiba Mervieniba' (supports 'm2'/'m²' and 'ha'/'ha.')."""
@@ -60,18 +51,81 @@ def _derive_size_m2(df: pd.DataFrame) -> pd.Series:
     return pd.Series([np.nan] * len(df), name="Platiba m2")
 
 
+@st.cache_data(show_spinner="Loading data…")
+def _load_data(path: str, mtime: float) -> pd.DataFrame:
+    """Read and type the data set once per file version (mtime is part of the cache key).
+    Numeric columns become floats, location/type columns categoricals, 'Platiba m2'
+    is derived here if the file lacks it and duplicate listings of a plot share a
+    'Canonical Link', so reruns only filter."""
+    df = pd.read_csv(path, dtype={"Zemes Numurs": str})
+    for c in NUMERIC_COLS:
+        if c in df.columns:
+            df[c] = _to_numeric_clean(df[c])
+    if "Platiba m2" not in df.columns:
+        size_m2 = _derive_size_m2(df)
+        if not size_m2.isna().all():
+            df["Platiba m2"] = size_m2.values
+    for c in CATEGORICAL_COLS:
+        if c in df.columns:
+            df[c] = df[c].astype("category")
+    return dedupe(df)
+
+
+def load_data(path: str = DATA_PATH) -> pd.DataFrame:
+    """Cached, typed data set; re-read only when the file changes on disk."""
+    return _load_data(path, os.path.getmtime(path))
+
+
+@st.cache_resource(show_spinner="Building aggregates…")
+def _load_cube(path: str, mtime: float) -> AggregateCube:
+    """Aggregate cube (counts, quartiles, trimmed means per location x type) of one
+    file version, so KPIs and the sunburst do not touch the rows on reruns."""
+    return AggregateCube(_load_data(path, mtime))
+
+
+def load_cube(path: str = DATA_PATH) -> AggregateCube:
+    """Cached aggregate cube of the data set; rebuilt only when the file changes on disk."""
+    return _load_cube(path, os.path.getmtime(path))
+
+
+@st.cache_resource(show_spinner="Indexing filters…")
+def _load_filter_index(path: str, mtime: float) -> FilterIndex:
+    """Row bitmaps per Pilseta / Zemes Tips / Pilseta/Pagasts value of one file version."""
+    return FilterIndex(_load_data(path, mtime))
+
+
+def load_filter_index(path: str = DATA_PATH) -> FilterIndex:
+    """Cached filter index of the data set; rebuilt only when the file changes on disk."""
+    return _load_filter_index(path, os.path.getmtime(path))
+
+
+@st.cache_resource
+def _load_table(path: str, mtime: float) -> PagedTable:
+    """Pager over one file version; keeps the per-column sort orders between reruns."""
+    return PagedTable(_load_data(path, mtime))
+
+
+def load_table(path: str = DATA_PATH) -> PagedTable:
+    """Cached pager of the data set; rebuilt only when the file changes on disk."""
+    return _load_table(path, os.path.getmtime(path))
+
+
 def main():
     st.title("Zeme Data Explorer")
     st.write("Simple Streamlit app to explore property data.")
-    df = pd.read_csv("df_zeme_filtered.csv")  # <-- switched to this CSV
+    # Cached resources only: load_data() would copy the whole frame on every rerun
+    cube = load_cube()
+    index = load_filter_index()
+    table = load_table()
+    columns = table.df.columns
 
     # ---- Metrics row (filled after filters) ---------------------------------
     m1, m2, m3 = st.columns(3)
 
     # ---- Filters (under metrics) --------------------------------------------
-    cities = sorted(df["Pilseta"].dropna().astype(str).unique()) if "Pilseta" in df.columns else []
-    types = sorted(df["Zemes Tips"].dropna().astype(str).unique()) if "Zemes Tips" in df.columns else []
-    pp_opts = sorted(df["Pilseta/Pagasts"].dropna().astype(str).unique()) if "Pilseta/Pagasts" in df.columns else []
+    cities = index.options("Pilseta")
+    types = index.options("Zemes Tips")
+    pp_opts = index.options("Pilseta/Pagasts")
 
     f1, f2, f3 = st.columns(3)
     with f1:
@@ -81,23 +135,20 @@ def main():
     with f3:
         sel_pp = st.multiselect("Pilseta/Pagasts", options=pp_opts, default=[])
 
-    # ---- Apply filters -------------------------------------------------------
-    filtered = df.copy()
-    if sel_cities and "Pilseta" in filtered.columns:
-        filtered = filtered[filtered["Pilseta"].astype(str).isin(sel_cities)]
-    if sel_types and "Zemes Tips" in filtered.columns:
-        filtered = filtered[filtered["Zemes Tips"].astype(str).isin(sel_types)]
-    if sel_pp and "Pilseta/Pagasts" in filtered.columns:
-        filtered = filtered[filtered["Pilseta/Pagasts"].astype(str).isin(sel_pp)]
-
-    # ---- KPIs (metrics) based on filtered data ------------------------------
-    property_count = int(filtered["Link"].dropna().shape[0]) if "Link" in filtered.columns else int(len(filtered))
-    avg_price = _iqr_trim_mean(filtered["Cena EUR"]) if "Cena EUR" in filtered.columns else float("nan")
-    size_m2_series = _derive_size_m2(filtered)
-    avg_size_m2 = _iqr_trim_mean(size_m2_series)
+    # ---- Apply filters (bitmap intersections -> positions of matching rows) --
+    filters = {"Pilseta": sel_cities, "Zemes Tips": sel_types, "Pilseta/Pagasts": sel_pp}
+    rows = index.rows(filters)
+
+    # ---- KPIs (metrics) from the aggregate cube ------------------------------
+    selected = cube.mask(filters)
+    kpis = cube.kpis(selected)
+    property_count = kpis["plots"]
+    avg_price = kpis.get("price", float("nan"))
+    avg_size_m2 = kpis.get("size", float("nan"))
 
     with m1:
-        st.metric("Property count", f"{property_count:,}")
+        st.metric("Property count", f"{property_count:,}",
+                  help=f"{kpis['count'] - property_count:,} duplicate listings of the same plot not counted")
     with m2:
         st.metric("Avg price (EUR)", "—" if np.isnan(avg_price) else f"{avg_price:,.0f} €")
     with m3:
@@ -106,22 +157,18 @@ def main():
     # ---- Sunburst: Pilseta -> Pilseta/Pagasts -> Ciems ----------------------
     st.subheader("Location hierarchy (Sunburst)")
     if _HAS_PLOTLY:
-        hierarchy_cols = [c for c in ["Pilseta", "Pilseta/Pagasts", "Ciems"] if c in filtered.columns]
+        hierarchy_cols = [c for c in ["Pilseta", "Pilseta/Pagasts", "Ciems"] if c in columns]
         if hierarchy_cols:
-            sun = filtered.copy()
-            # Count weights: prefer non-null Link counts; otherwise each row counts as 1
-            sun["__value__"] = sun["Link"].notna().astype(int) if "Link" in sun.columns else 1
-            # Fill missing labels for cleaner hierarchy
-            for c in hierarchy_cols:
-                sun[c] = sun[c].fillna("—").astype(str).str.strip().replace({"": "—"})
+            # Plot counts per location path (missing labels -> "—"), summed from the cube
+            sun = cube.hierarchy(selected, path=hierarchy_cols, value="plots")
             fig = px.sunburst(
                 sun,
                 path=hierarchy_cols,        # 1: Pilseta, 2: Pilseta/Pagasts, 3: Ciems
-                values="__value__",
+                values="plots",
                 title="Properties by Pilseta → Pagasts → Ciems",
             )
             fig.update_layout(margin=dict(l=0, r=0, t=40, b=0), height=600)
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(fig, width="stretch")
         else:
             st.info("Sunburst requires at least one of: 'Pilseta', 'Pilseta/Pagasts', 'Ciems'.")
     else:
@@ -130,30 +177,54 @@ def main():
     # ---- Kadastra karte overlay (LVM) — temporarily disabled -----------------
     # Map overlay (WMS/WFS) is commented out per request. Reinsert later if needed.
 
-    # ---- Data table (show filtered results) ---------------------------------
-    df_display = filtered.copy()
-    if "Platiba m2" not in df_display.columns and not size_m2_series.isna().all():
-        df_display["Platiba m2"] = size_m2_series
+    # ---- Data table: one page of the filtered rows, sorted in the data layer --
+    t1, t2, t3 = st.columns(3)
+    with t1:
+        sort_by = st.selectbox("Sort by", options=[None, *columns],
+                               format_func=lambda c: "—" if c is None else c)
+    with t2:
+        page_size = st.selectbox("Rows per page", options=[50, 100, 500, 1000], index=1)
+    with t3:
+        descending = st.toggle("Descending", value=False)
+    n_rows = index.n_rows if rows is None else len(rows)
+    n_pages = max(1, -(-n_rows // page_size))
+    # Keyed by the selection: changing filters, sort or page size starts again at page 1
+    page = st.number_input(f"Page (of {n_pages:,})", min_value=1, max_value=n_pages, value=1, step=1,
+                           key=f"page:{filters!r}:{sort_by}:{descending}:{page_size}")
+
+    page_df, n_rows = table.page(rows, sort_by, not descending, page - 1, page_size)
+    first = (page - 1) * page_size
+    st.caption(f"Rows {first + 1 if n_rows else 0:,}–{first + len(page_df):,} of {n_rows:,}")
+    _show_table(page_df)
+
+    # Full filtered result as CSV, generated in chunks only when the button is clicked
+    st.download_button(
+        "Download all filtered rows (CSV)",
+        data=lambda: table.to_csv(rows, sort_by, not descending),
+        file_name="zeme_filtered.csv",
+        mime="text/csv",
+    )
+
 
-    # Show links as a single 🔗 icon instead of full URL
-    if "Link" in df_display.columns:
-        df_show = df_display.copy()
-        df_show["Open"] = df_show["Link"]  # preserve URL
-        column_order = ["Open"] + [c for c in df_show.columns if c not in ("Open", "Link")]
+def _show_table(page_df: pd.DataFrame):
+    """Render one table page; links are shown as a single 🔗 icon instead of the full URL."""
+    if "Link" in page_df.columns:
+        page_df = page_df.assign(Open=page_df["Link"])  # preserve URL
+        column_order = ["Open"] + [c for c in page_df.columns if c not in ("Open", "Link")]
         st.dataframe(
-            df_show[column_order],
+            page_df[column_order],
             column_config={
                 "Open": st.column_config.LinkColumn(
                     "Open", help="Open listing", display_text="🔗"
                 ),
             },
-            use_container_width=True,
+            width="stretch",
             height=600,
         )
     else:
         st.dataframe(
-            df_display,
-            use_container_width=True,
+            page_df,
+            width="stretch",
             height=600,
         )
 
@@ -0,0 +1,29 @@
+# zeme
+# ss.lv plots & lands scraper package.
+#   scraper     two-phase scrape (discovery -> listing rows -> ad pages), run_profiles,
+#               stream_profiles (rows written to a sink as they are parsed)
+#   profiles    filter profiles (Collection_filters.txt / TOML)
+#   sink        streaming outputs: CSV, Parquet, SQLite
+#   history     SQLite listing history: first/last seen, price / area versions
+#   seen        persistent index of fetched ads (new_only profiles skip them)
+#   dedup       cross-listing duplicates: canonical Link per plot (Zemes Numurs / blocking)
+#   cache, ratelimit, fetch, extract, checkpoint, snapshot: building blocks
+# Run several profiles in one scrape with: python -m zeme --profiles profiles.toml
+
+from .checkpoint import RunCheckpoint
+from .dedup import CANONICAL_COL, canonical_links, dedupe
+from .history import ListingHistory
+from .profiles import Profile, load_profiles, read_filters_file
+from .seen import SeenIndex
+from .sink import open_sink
+from .snapshot import load_snapshot, read_snapshots, write_snapshot
+
+# The scraper (requests, bs4, lxml) loads on first use, so the dashboard's modules
+# (zeme.dashboard, zeme.dedup) import with requirements.txt alone
+_SCRAPER_NAMES = {"ROOT", "run_profiles", "stream_profiles"}
+
+def __getattr__(name):
+    if name in _SCRAPER_NAMES:
+        from . import scraper
+        return getattr(scraper, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
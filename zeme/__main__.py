@@ -0,0 +1,94 @@
+# python -m zeme --profiles profiles.toml [--profile NAME ...] [--mode hybrid] [--resume RUN_ID]
+# One scrape for all selected profiles; each profile's output is written to
+# <out>/<profile>_<YYYY-MM-DD>.csv and, with --snapshot-dir, to <snapshot-dir>/<profile>/.
+# --stream csv|parquet|sqlite writes <out>/<profile>_<YYYY-MM-DD>.<format> batch by batch
+# while ads are parsed instead (full mode, no snapshots; memory stays flat).
+# The run report (timings, requests, cache hits, ...) goes to <runs-dir>/<run id>/metrics.json;
+# the run's checkpoint files are deleted once it succeeds (zeme.checkpoint.KEEP_FINISHED).
+# --history DB upserts the run into a SQLite listing history (zeme.history).
+# --dedupe adds a "Canonical Link" column: one Link per plot listed several times (zeme.dedup).
+
+import argparse
+import os
+from contextlib import ExitStack
+from datetime import datetime
+
+import pandas as pd
+
+from . import scraper
+from .checkpoint import RunCheckpoint
+from .dedup import dedupe
+from .history import ListingHistory
+from .profiles import load_profiles
+from .sink import open_sink
+from .snapshot import write_snapshot
+
+STREAM_FORMATS = {"csv": ".csv", "parquet": ".parquet", "sqlite": ".sqlite"}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m zeme",
+                                 description="Scrape ss.lv plots & lands once for several filter profiles.")
+    ap.add_argument("--profiles", default="profiles.toml",
+                    help="TOML profiles or a Collection_filters.txt-style file (default: profiles.toml)")
+    ap.add_argument("--profile", action="append", metavar="NAME", help="run only these profiles")
+    ap.add_argument("--mode", choices=("full", "listing", "hybrid"), help=f"default {scraper.SCRAPE_MODE}")
+    ap.add_argument("--out", default="out", help="directory for the CSV outputs (default: out)")
+    ap.add_argument("--snapshot-dir", help="also write each profile to a Parquet store <dir>/<profile>")
+    ap.add_argument("--stream", choices=STREAM_FORMATS,
+                    help="write rows as they are parsed (full mode only, no --snapshot-dir)")
+    ap.add_argument("--history", metavar="DB", help="also upsert the run into a SQLite listing history")
+    ap.add_argument("--dedupe", action="store_true",
+                    help="add a Canonical Link column marking duplicate listings of the same plot")
+    ap.add_argument("--prometheus", metavar="PATH", help="also write run metrics in Prometheus text format")
+    ap.add_argument("--runs-dir", default="runs", help="checkpoint directory (default: runs)")
+    ap.add_argument("--resume", metavar="RUN_ID", help="continue the checkpointed run <runs-dir>/RUN_ID")
+    args = ap.parse_args(argv)
+
+    profiles = load_profiles(args.profiles)
+    if args.profile:
+        missing = set(args.profile) - set(profiles)
+        if missing:
+            ap.error(f"unknown profile(s) {sorted(missing)}; {args.profiles} has {list(profiles)}")
+        profiles = {name: profiles[name] for name in args.profile}
+    if args.stream and (args.snapshot_dir or args.history or args.dedupe or args.mode not in (None, "full")):
+        ap.error("--stream works with --mode full and without --snapshot-dir / --history / --dedupe")
+
+    if args.prometheus:
+        scraper.PROMETHEUS_FILE = args.prometheus
+    run = (RunCheckpoint.resume(args.runs_dir, args.resume) if args.resume
+           else RunCheckpoint.create(args.runs_dir))
+    if scraper.VERBOSE:
+        print(f"[RUN] id={run.run_id} (resume with --resume {run.run_id})")
+
+    os.makedirs(args.out, exist_ok=True)
+    if args.stream:
+        with ExitStack() as stack:
+            sinks = {name: stack.enter_context(open_sink(os.path.join(
+                         args.out, f"{name}_{datetime.now():%Y-%m-%d}{STREAM_FORMATS[args.stream]}")))
+                     for name in profiles}
+            written = scraper.stream_profiles(profiles.values(), sinks, run=run)
+        for name, rows in written.items():
+            print(f"[{name}] {rows} adverts -> {sinks[name].path}")
+        run.finish()
+        return
+
+    frames = scraper.run_profiles(profiles.values(), run=run, mode=args.mode)
+    for name, df in frames.items():
+        if args.dedupe:
+            df = dedupe(df)
+        out_path = os.path.join(args.out, f"{name}_{datetime.now():%Y-%m-%d}.csv")
+        df.to_csv(out_path, index=False)
+        print(f"[{name}] {len(df)} adverts -> {out_path}")
+        if args.snapshot_dir:
+            write_snapshot(df, os.path.join(args.snapshot_dir, name))
+    if args.history:
+        # Profiles overlap: every ad once (first profile wins)
+        frames = [df for df in frames.values() if not df.empty]
+        if frames:
+            with ListingHistory(args.history) as history:
+                counts = history.ingest(pd.concat(frames, ignore_index=True))
+            print(f"[HISTORY] {counts['rows']} ads, {counts['new']} new, {counts['changed']} changed -> {args.history}")
+    run.finish()
+
+if __name__ == "__main__":
+    main()
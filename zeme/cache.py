@@ -0,0 +1,160 @@
+# zeme/cache.py
+# On-disk HTTP response cache for the scrapers' requests session.
+# CachingAdapter sits under sess() (mounted instead of the plain HTTPAdapter), so
+# retries, redirects and every sess().get(...) call site stay exactly as they are.
+# It extends RateLimitedAdapter: only real network sends take a rate-limiter token.
+#   - bodies stored gzip-compressed, one file per URL (sha1 key)
+#   - freshness by URL class (category/listing pages short, ad pages long)
+#   - stale entries are revalidated with If-None-Match / If-Modified-Since;
+#     a 304 refreshes the entry and serves the cached body
+#   - entries not refreshed for PRUNE_AFTER x their TTL (delisted ads, old listing
+#     pages) are deleted when the adapter starts, so the cache does not grow forever
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from .ratelimit import RateLimitedAdapter
+
+# (url regex, ttl seconds) - first match wins
+DEFAULT_TTLS = (
+    (r"/msg/",     24 * 3600),   # ad pages rarely change
+    (r"/sell/",    30 * 60),     # listing pages (+ pagination redirects)
+    (r".*",        30 * 60),     # category pages
+)
+CACHEABLE_STATUS = {200, 301, 302, 303, 307, 308}
+PRUNE_AFTER      = 10  # x TTL; None keeps every entry
+
+class CachingAdapter(RateLimitedAdapter):
+    def __init__(self, cache_dir, ttls=DEFAULT_TTLS, prune_after=PRUNE_AFTER, **kwargs):
+        super().__init__(**kwargs)
+        self.cache_dir = cache_dir
+        self.ttls = [(re.compile(p), ttl) for p, ttl in ttls]
+        os.makedirs(cache_dir, exist_ok=True)
+        if prune_after:
+            self.prune(prune_after)
+
+    # ---------- storage ----------
+    def _path(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key + ".gz")
+
+    def _ttl(self, url):
+        for rx, ttl in self.ttls:
+            if rx.search(url):
+                return ttl
+        return 0
+
+    def _load(self, url):
+        try:
+            with gzip.open(self._path(url), "rb") as f:
+                meta = json.loads(f.readline())
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None
+
+    def prune(self, after=PRUNE_AFTER):
+        """
+        Delete entries stored / revalidated more than `after` x their TTL ago, and
+        leftover temp files of interrupted writes -> number of files deleted.
+        """
+        now = time.time()
+        ttls = [ttl for _, ttl in self.ttls] or [0]
+        shortest, longest = min(ttls) * after, max(ttls) * after
+        removed = 0
+        for sub in os.scandir(self.cache_dir):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                try:
+                    age = now - entry.stat().st_mtime
+                    if age <= shortest:
+                        continue
+                    if entry.name.endswith(".gz") and age <= longest:
+                        # only the entry's own URL class tells whether it is expired
+                        with gzip.open(entry.path, "rb") as f:
+                            meta = json.loads(f.readline())
+                        if now - meta["stored_at"] <= self._ttl(meta["url"]) * after:
+                            continue
+                    os.remove(entry.path)
+                    removed += 1
+                except (OSError, EOFError, ValueError, KeyError):
+                    continue  # deleted / rewritten meanwhile by another process
+        return removed
+
+    def _store(self, url, meta, body):
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+            f.write(json.dumps(meta).encode("utf-8") + b"\n")
+            f.write(body)
+        os.replace(tmp, path)  # atomic: concurrent fetchers never see half-written files
+
+    def _from_cache(self, request, meta, body, revalidated=None):
+        r = Response()
+        r.status_code = meta["status"]
+        r.reason = meta.get("reason", "")
+        r.headers = CaseInsensitiveDict(meta["headers"])
+        r.encoding = get_encoding_from_headers(r.headers)
+        r.url = request.url
+        r.request = request
+        r.connection = self
+        r._content = body
+        r._content_consumed = True
+        r.from_cache = True
+        r.revalidated = revalidated is not None  # served after a 304 from the network
+        if revalidated is not None:
+            r.elapsed = revalidated.elapsed
+            r.raw = revalidated.raw
+        return r
+
+    # ---------- transport ----------
+    def send(self, request, **kwargs):
+        if request.method != "GET":
+            return super().send(request, **kwargs)
+
+        url = request.url
+        cached = self._load(url)
+        if cached:
+            meta, body = cached
+            if time.time() - meta["stored_at"] < self._ttl(url):
+                return self._from_cache(request, meta, body)
+            hdrs = CaseInsensitiveDict(meta["headers"])
+            validators = {}
+            if hdrs.get("ETag"):
+                validators["If-None-Match"] = hdrs["ETag"]
+            if hdrs.get("Last-Modified"):
+                validators["If-Modified-Since"] = hdrs["Last-Modified"]
+            if validators:
+                request = request.copy()
+                request.headers.update(validators)
+
+        resp = super().send(request, **kwargs)
+
+        if resp.status_code == 304 and cached:
+            resp.content  # read the empty body so the connection goes back to the pool
+            meta["stored_at"] = time.time()
+            self._store(url, meta, body)
+            return self._from_cache(request, meta, body, revalidated=resp)
+
+        if resp.status_code in CACHEABLE_STATUS:
+            meta = {
+                "url": url,
+                "status": resp.status_code,
+                "reason": resp.reason,
+                "headers": {k: v for k, v in resp.headers.items()
+                            if k.lower() not in ("content-encoding", "transfer-encoding", "content-length")},
+                "stored_at": time.time(),
+            }
+            self._store(url, meta, resp.content)
+        resp.from_cache = False
+        return resp
@@ -0,0 +1,133 @@
+# zeme/checkpoint.py
+# Checkpointed scrape runs: <runs_dir>/<run_id>/ (run_id: <YYYYmmdd-HHMMSS>-<pid>-<random>)
+#   regions.json         region URL -> name from the category page
+#   listing_pages.json   phase 1 result  [(owner_url, page_url, rows), ...]
+#   listing_records.json unique listing-row records (Link, price, area, ...) of phase 2
+#   details.jsonl        parsed ad details, appended every `every` ads
+# A crashed run is continued with --resume <run_id>: finished stages are loaded
+# from disk and only ads without a stored detail are fetched again.
+# finish() after a successful run deletes these files (the run report, metrics.json,
+# stays), so daily runs do not pile up copies of every parsed ad.
+
+import json
+import os
+import uuid
+from datetime import datetime
+
+CHECKPOINT_EVERY = 50   # flush parsed details to disk every N ads
+KEEP_FINISHED    = False  # True -> finish() leaves the stage files of successful runs
+STAGE_FILES      = ["regions.json", "listing_pages.json", "listing_records.json", "details.jsonl"]
+
+class RunCheckpoint:
+    def __init__(self, run_dir, every=CHECKPOINT_EVERY):
+        self.run_dir = run_dir
+        self.run_id = os.path.basename(os.path.normpath(run_dir))
+        self.every = every
+        self._pending = []
+        self._at_finish = []
+        os.makedirs(run_dir, exist_ok=True)
+
+    @classmethod
+    def create(cls, runs_dir, **kwargs):
+        # run id: start time + pid + random suffix, so runs started in the same
+        # second (cron + manual, several processes) never share a directory
+        run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        run_dir = os.path.join(runs_dir, run_id)
+        os.makedirs(run_dir, exist_ok=False)
+        return cls(run_dir, **kwargs)
+
+    @classmethod
+    def resume(cls, runs_dir, run_id, **kwargs):
+        run_dir = os.path.join(runs_dir, run_id)
+        if not os.path.isdir(run_dir):
+            raise FileNotFoundError(f"No checkpointed run {run_id!r} in {runs_dir}")
+        return cls(run_dir, **kwargs)
+
+    def _path(self, name):
+        return os.path.join(self.run_dir, name)
+
+    # ---------- stage results (written once, atomically) ----------
+    def _save_json(self, name, obj):
+        tmp = self._path(name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False)
+        os.replace(tmp, self._path(name))
+
+    def _load_json(self, name):
+        path = self._path(name)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_listing_pages(self, listing_pages):
+        self._save_json("listing_pages.json", [list(p) for p in listing_pages])
+
+    def load_listing_pages(self):
+        pages = self._load_json("listing_pages.json")
+        return None if pages is None else [tuple(p) for p in pages]
+
+    def save_region_names(self, region_names):
+        self._save_json("regions.json", dict(region_names))
+
+    def load_region_names(self):
+        return self._load_json("regions.json")
+
+    def save_listing_records(self, records):
+        self._save_json("listing_records.json", list(records))
+
+    def load_listing_records(self):
+        return self._load_json("listing_records.json")
+
+    # ---------- parsed details (appended in batches) ----------
+    def details(self):
+        """Details stored so far (a torn last line from a crash is ignored)."""
+        path = self._path("details.jsonl")
+        if not os.path.exists(path):
+            return []
+        out = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    out.append(json.loads(line))
+                except ValueError:
+                    break
+        return out
+
+    def record(self, url, result):
+        """fetch_parse_all on_result hook: buffer successful details, flush every `every`."""
+        if isinstance(result, Exception):
+            return
+        self._pending.append(result)
+        if len(self._pending) >= self.every:
+            self.flush()
+
+    def at_finish(self, func):
+        """Call func() in finish(), i.e. only once the run's outputs are written."""
+        self._at_finish.append(func)
+
+    def finish(self):
+        """
+        Run succeeded: run the at_finish callbacks, then drop the stage files (unless
+        KEEP_FINISHED) and the run dir if empty.
+        """
+        self.flush()
+        for func in self._at_finish:
+            func()
+        self._at_finish = []
+        if KEEP_FINISHED:
+            return
+        for name in STAGE_FILES:
+            path = self._path(name)
+            if os.path.exists(path):
+                os.remove(path)
+        if not os.listdir(self.run_dir):
+            os.rmdir(self.run_dir)
+
+    def flush(self):
+        if not self._pending:
+            return
+        with open(self._path("details.jsonl"), "a", encoding="utf-8") as f:
+            for d in self._pending:
+                f.write(json.dumps(d, ensure_ascii=False) + "\n")
+        self._pending = []
@@ -0,0 +1,272 @@
+# zeme/dashboard.py
+# Data layer for streamlit_app.py, built once per data set version (the app caches it).
+#   AggregateCube  cells = Pilseta x Pilseta/Pagasts x Ciems x Zemes Tips with row / link
+#                  counts, quartiles and IQR-trimmed means of price and size. KPIs and the
+#                  location hierarchy of any selection are served from the cells; the
+#                  trimmed means stay exact (values are kept sorted, with their cell id).
+#                  With dedup.CANONICAL_COL, duplicate listings of a plot count once
+#                  ("plots") and only its first listing in the selection enters the
+#                  quartiles / means (one listing per plot and cell is kept for that).
+#   FilterIndex    the multiselect columns as integer codes with one packed row bitmap
+#                  per value: a selection is OR within a column, AND across columns,
+#                  and the filtered view takes only the matching rows.
+#   PagedTable     sorted pages of a selection: per-column sort orders are computed once,
+#                  only the visible page (or one CSV chunk at a time) is materialized.
+
+import io
+
+import numpy as np
+import pandas as pd
+
+from .dedup import CANONICAL_COL
+
+CUBE_DIMS     = ["Pilseta", "Pilseta/Pagasts", "Ciems", "Zemes Tips"]
+CUBE_MEASURES = {"price": "Cena EUR", "size": "Platiba m2"}
+HIERARCHY     = ["Pilseta", "Pilseta/Pagasts", "Ciems"]
+FILTER_COLS   = ["Pilseta", "Zemes Tips", "Pilseta/Pagasts"]
+MISSING_LABEL = "—"
+PAGE_SIZE     = 100
+CSV_CHUNK     = 50_000  # rows per chunk when writing a selection as CSV
+
+def _quantile(values, q):
+    """pandas' default (linear) quantile of an ascending, NaN-free array."""
+    pos = (len(values) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+def iqr_trim_mean(values, prefix=None):
+    """
+    Mean after dropping values outside [q1 - 1.5*IQR, q3 + 1.5*IQR] (plain mean if
+    IQR is 0 or everything is dropped) of an ascending, NaN-free array.
+    prefix: cumulative sums of `values` with a leading 0 (computed if omitted).
+    """
+    n = len(values)
+    if n == 0:
+        return float("nan")
+    if prefix is None:
+        prefix = np.concatenate(([0.0], np.cumsum(values)))
+    q1, q3 = _quantile(values, 0.25), _quantile(values, 0.75)
+    iqr = q3 - q1
+    lo = np.searchsorted(values, q1 - 1.5 * iqr, side="left")
+    hi = np.searchsorted(values, q3 + 1.5 * iqr, side="right")
+    if iqr == 0 or hi <= lo:
+        return float((prefix[n] - prefix[0]) / n)
+    return float((prefix[hi] - prefix[lo]) / (hi - lo))
+
+class AggregateCube:
+    def __init__(self, df: pd.DataFrame, dims=CUBE_DIMS, measures=CUBE_MEASURES, link_col="Link",
+                 canonical_col=CANONICAL_COL):
+        self.dims = [d for d in dims if d in df.columns]
+        if self.dims:
+            groups = df.groupby(self.dims, dropna=False, observed=True, sort=True)
+            cell = groups.ngroup().to_numpy()
+            cells = groups.size().rename("rows").reset_index()
+        else:
+            cell = np.zeros(len(df), dtype=np.int64)
+            cells = pd.DataFrame({"rows": [len(df)]})
+        n_cells = len(cells)
+        links = df[link_col].notna().to_numpy() if link_col in df.columns else np.ones(len(df), bool)
+        cells["links"] = np.bincount(cell, weights=links, minlength=n_cells).astype(np.int64)
+        # first row of each plot (duplicate cluster) per cell; rows without a canonical
+        # link stand alone. A selection keeps the first of these per plot (see _chosen).
+        self._links = links
+        self._plots = None
+        first = np.ones(len(df), dtype=bool)
+        if canonical_col in df.columns:
+            plot = pd.factorize(df[canonical_col])[0]
+            alone = plot < 0
+            plot[alone] = plot.max(initial=-1) + 1 + np.arange(alone.sum())
+            first = ~pd.DataFrame({"cell": cell, "plot": plot}).duplicated().to_numpy()
+            rows = np.flatnonzero(first)
+            self._plots = (cell[rows], plot[rows], rows)
+        cells["plots"] = np.bincount(cell, weights=links & first, minlength=n_cells).astype(np.int64)
+
+        # Per measure: values sorted overall (+ their cells) for selections, and sorted
+        # within cells for the per-cell statistics
+        self.measures, self._values = {}, {}
+        for name, col in measures.items():
+            if col not in df.columns:
+                continue
+            values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+            self._values[name] = values
+            ok = ~np.isnan(values) & first
+            values, owner = values[ok], cell[ok]
+            order = np.argsort(values, kind="stable")
+            self.measures[name] = (values[order], owner[order])
+
+            by_cell = np.lexsort((values, owner))
+            sorted_values = values[by_cell]
+            prefix = np.concatenate(([0.0], np.cumsum(sorted_values)))
+            bounds = np.searchsorted(owner[by_cell], np.arange(n_cells + 1))
+            stats = np.full((n_cells, 3), np.nan)
+            for c in range(n_cells):
+                a, b = bounds[c], bounds[c + 1]
+                if b > a:
+                    block = sorted_values[a:b]
+                    stats[c] = (_quantile(block, 0.25), _quantile(block, 0.75),
+                                iqr_trim_mean(block, prefix[a:b + 1]))
+            cells[f"{name}_n"] = np.diff(bounds)
+            cells[[f"{name}_q1", f"{name}_q3", f"{name}_mean"]] = stats
+        self.cells = cells
+        self._everything = np.ones(n_cells, dtype=bool)
+        self._kpis_all = None
+
+    def __len__(self):
+        return len(self.cells)
+
+    def mask(self, filters=None):
+        """
+        Cells matching every filter: {dim: selected values}; empty / None selections
+        and dims the data set lacks do not filter.
+        """
+        keep = self._everything
+        for dim, values in (filters or {}).items():
+            if values and dim in self.dims:
+                keep = keep & self.cells[dim].astype(str).isin(list(values)).to_numpy()
+        return keep
+
+    def kpis(self, mask=None) -> dict:
+        """
+        {"count": ads with a link, "plots": the same without duplicate listings,
+         <measure>: IQR-trimmed mean (one value per plot), ...} over the selected cells.
+        """
+        if mask is None or mask.all():
+            if self._kpis_all is None:
+                self._kpis_all = self._kpis(self._everything)
+            return dict(self._kpis_all)
+        return self._kpis(mask)
+
+    def _kpis(self, mask):
+        out = {"count": int(self.cells["links"].to_numpy()[mask].sum())}
+        if self._plots is None:
+            out["plots"] = out["count"]
+            for name, (values, owner) in self.measures.items():
+                out[name] = iqr_trim_mean(values[mask[owner]])
+            return out
+        chosen = self._chosen(mask)
+        out["plots"] = int(self._links[chosen].sum())
+        for name, values in self._values.items():
+            values = values[chosen]
+            out[name] = iqr_trim_mean(np.sort(values[~np.isnan(values)]))
+        return out
+
+    def _chosen(self, mask):
+        """Rows of the selected cells, one per plot: its first listing among them."""
+        cell, plot, rows = self._plots
+        keep = mask[cell]
+        plot, rows = plot[keep], rows[keep]
+        return rows[np.unique(plot, return_index=True)[1]]  # rows ascending -> first one wins
+
+    def hierarchy(self, mask=None, path=HIERARCHY, value="links") -> pd.DataFrame:
+        """
+        Selected cells summed per location path (missing / blank labels -> MISSING_LABEL),
+        e.g. for px.sunburst(..., path=path, values=value). "plots" counts a plot listed
+        under several cells of one path once there.
+        """
+        path = [c for c in path if c in self.dims]
+        selected = self._everything if mask is None else mask
+        labels = pd.DataFrame({c: self.cells[c].astype(object).fillna(MISSING_LABEL).astype(str).str.strip()
+                                   .replace({"": MISSING_LABEL}) for c in path})
+        if value == "plots" and self._plots is not None and path:
+            cell, plot, rows = self._plots
+            keep = selected[cell] & self._links[rows]
+            pairs = labels.take(cell[keep]).assign(plot=plot[keep]).drop_duplicates()
+            return pairs.groupby(path, sort=True).size().rename(value).reset_index()
+        labels = labels[selected]
+        labels[value] = self.cells[value].to_numpy()[selected]
+        return labels.groupby(path, sort=True).sum().reset_index() if path else labels
+
+class FilterIndex:
+    def __init__(self, df: pd.DataFrame, columns=FILTER_COLS):
+        self.n_rows = len(df)
+        self.columns = [c for c in columns if c in df.columns]
+        self.labels, self._bitmaps = {}, {}
+        for col in self.columns:
+            codes, uniques = pd.factorize(df[col])
+            self.labels[col] = {str(v): k for k, v in enumerate(uniques)}
+            # one bitmap per value, 1 bit per data row (missing values are in none)
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            bitmaps = np.zeros((len(uniques), (self.n_rows + 7) // 8), dtype=np.uint8)
+            hit = np.zeros(self.n_rows, dtype=bool)
+            for k in range(len(uniques)):
+                rows = order[bounds[k]:bounds[k + 1]]
+                hit[rows] = True
+                bitmaps[k] = np.packbits(hit)
+                hit[rows] = False
+            self._bitmaps[col] = bitmaps
+
+    def options(self, col):
+        """Sorted values of a filter column (for the multiselect)."""
+        return sorted(self.labels.get(col, ()))
+
+    def bitmap(self, filters=None):
+        """
+        Packed bitmap of the rows matching every filter ({column: selected values}),
+        or None if nothing filters (empty selections and unknown columns are ignored).
+        """
+        bits = None
+        for col, values in (filters or {}).items():
+            if not values or col not in self._bitmaps:
+                continue
+            ids = [self.labels[col][v] for v in values if v in self.labels[col]]
+            any_of = (np.bitwise_or.reduce(self._bitmaps[col][ids], axis=0) if ids
+                      else np.zeros(self._bitmaps[col].shape[1], dtype=np.uint8))
+            bits = any_of if bits is None else bits & any_of
+        return bits
+
+    def rows(self, filters=None):
+        """Ascending positions of the matching rows, or None for all rows."""
+        bits = self.bitmap(filters)
+        if bits is None:
+            return None
+        return np.flatnonzero(np.unpackbits(bits, count=self.n_rows))
+
+    def count(self, filters=None):
+        bits = self.bitmap(filters)
+        return self.n_rows if bits is None else int(np.unpackbits(bits, count=self.n_rows).sum())
+
+    def view(self, df: pd.DataFrame, filters=None) -> pd.DataFrame:
+        """Filtered rows of the indexed frame: df itself when nothing filters (no copy)."""
+        rows = self.rows(filters)
+        return df if rows is None else df.take(rows)
+
+class PagedTable:
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._orders = {}
+
+    def order(self, col, ascending=True):
+        """All row positions sorted by `col` (stable, missing values last), cached."""
+        key = (col, ascending)
+        if key not in self._orders:
+            values = self.df[col].reset_index(drop=True)
+            self._orders[key] = values.sort_values(ascending=ascending, kind="stable",
+                                                   na_position="last").index.to_numpy()
+        return self._orders[key]
+
+    def positions(self, rows=None, sort_by=None, ascending=True):
+        """Positions of the selected rows (None = all, e.g. FilterIndex.rows) in display order."""
+        if sort_by is None:
+            return np.arange(len(self.df)) if rows is None else rows
+        order = self.order(sort_by, ascending)
+        if rows is None:
+            return order
+        keep = np.zeros(len(self.df), dtype=bool)
+        keep[rows] = True
+        return order[keep[order]]
+
+    def page(self, rows=None, sort_by=None, ascending=True, page=0, page_size=PAGE_SIZE):
+        """-> (rows of page `page` (0-based), number of selected rows)"""
+        pos = self.positions(rows, sort_by, ascending)
+        return self.df.take(pos[page * page_size:(page + 1) * page_size]), len(pos)
+
+    def to_csv(self, rows=None, sort_by=None, ascending=True, chunk_rows=CSV_CHUNK) -> bytes:
+        """The whole selection as UTF-8 CSV, written CSV_CHUNK rows at a time."""
+        pos = self.positions(rows, sort_by, ascending)
+        buf = io.BytesIO()
+        for start in range(0, max(len(pos), 1), chunk_rows):
+            self.df.take(pos[start:start + chunk_rows]).to_csv(buf, index=False, header=start == 0,
+                                                               encoding="utf-8")
+        return buf.getvalue()
@@ -0,0 +1,143 @@
+# zeme/dedup.py
+# Cross-listing duplicates: the same plot posted under several Links (re-posts, agents).
+# Every row gets CANONICAL_COL, the Link of its cluster's first listing (frame order,
+# i.e. oldest first for read_snapshots / ListingHistory.listings), so counts and
+# averages can take one row per plot.
+#   cadastre  ads with the same Zemes Numurs (digits only: "3244 006 0226" ==
+#             "32440060226"; placeholders shorter than CADASTRE_DIGITS are ignored)
+#   blocking  ads without one are grouped by (Pilseta/Pagasts, Platiba m2 to
+#             AREA_DIGITS significant digits, Cena EUR) and linked inside a block when
+#             their streets agree (same words or one a subset of the other; an ad
+#             without a street joins only a block whose streets all agree).
+#             A block of ads without a number joins a cadastre cluster only if it
+#             matches exactly one Zemes Numurs; blocks over MAX_BLOCK ads are too
+#             generic to mean "same plot" and are skipped.
+# Each Link is one unit (history frames repeat it per date) and only pairs inside a
+# block are compared, so the cost stays ~linear in the number of ads.
+
+import re
+
+import numpy as np
+import pandas as pd
+
+CANONICAL_COL   = "Canonical Link"
+CADASTRE_DIGITS = 10  # shorter numbers are placeholders / typos ("555555")
+AREA_DIGITS     = 2   # 12 700 m2 and "1.3 ha" land in the same block
+MAX_BLOCK       = 50
+STREET_NOISE    = {"iela", "iel", "ielā", "nr"}
+
+_DIGITS_RE = re.compile(r"\d[\d ]*")
+_WORDS_RE  = re.compile(r"\w+")
+
+def cadastre_key(value):
+    """Zemes Numurs -> its digits ("3244 006 0226", "32440060226/76" -> "32440060226"), or None."""
+    if value is None or value != value:
+        return None
+    m = _DIGITS_RE.search(str(value))
+    digits = m.group(0).replace(" ", "") if m else ""
+    return digits if len(digits) >= CADASTRE_DIGITS else None
+
+def street_words(value):
+    """Iela -> frozenset of lowercase words without "iela" & co. (empty if missing)."""
+    if value is None or value != value or str(value) == "NA":
+        return frozenset()
+    return frozenset(w for w in _WORDS_RE.findall(str(value).casefold()) if w not in STREET_NOISE)
+
+def _round_sig(values, digits):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = 10.0 ** (np.floor(np.log10(np.abs(values))) - (digits - 1))
+        return np.round(values / scale) * scale
+
+def _column(df, col):
+    return df[col] if col in df.columns else pd.Series(np.nan, index=df.index)
+
+def _components(n, a, b):
+    """Connected components of n nodes / edges a-b: smallest node of each component."""
+    labels = np.arange(n)
+    while len(a):
+        low = np.minimum(labels[a], labels[b])
+        new = labels.copy()
+        np.minimum.at(new, a, low)
+        np.minimum.at(new, b, low)
+        new = new[new]
+        if np.array_equal(new, labels):
+            break
+        labels = new
+    return labels
+
+def _block_pairs(units, numbered):
+    """Candidate duplicate pairs (i, j) of units: same block, compatible streets, not both numbered."""
+    price = pd.to_numeric(units["Cena EUR"], errors="coerce").to_numpy(dtype=float)
+    area = _round_sig(pd.to_numeric(units["Platiba m2"], errors="coerce").to_numpy(dtype=float), AREA_DIGITS)
+    place = units["Pilseta/Pagasts"].astype(object).where(units["Pilseta/Pagasts"].notna(), None)
+    place = place.map(lambda v: None if v is None else str(v).strip().casefold())
+    ok = (price > 0) & (area > 0) & place.notna().to_numpy()
+    ok = np.flatnonzero(ok)
+    if len(ok) < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    block = pd.DataFrame({"place": place.to_numpy()[ok], "area": area[ok], "price": price[ok]})
+    codes = block.groupby(["place", "area", "price"], sort=False).ngroup().to_numpy()
+    order = np.argsort(codes, kind="stable")
+    bounds = np.flatnonzero(np.diff(codes[order])) + 1
+    streets = units["Iela"].map(street_words).to_numpy() if "Iela" in units.columns else None
+    left, right = [], []
+    for members in np.split(ok[order], bounds):
+        if len(members) < 2 or len(members) > MAX_BLOCK:
+            continue
+        pairs = [(i, j) for x, i in enumerate(members) for j in members[x + 1:]
+                 if not (numbered[i] and numbered[j])]  # both numbered: the numbers decide
+        if streets is not None:
+            named = [m for m in members if streets[m]]
+            agree = all(streets[i] <= streets[j] or streets[j] <= streets[i]
+                        for x, i in enumerate(named) for j in named[x + 1:])
+            # an ad without a street only joins a block whose streets all agree
+            pairs = [(i, j) for i, j in pairs
+                     if (streets[i] and streets[j] and (streets[i] <= streets[j] or streets[j] <= streets[i]))
+                     or (not (streets[i] and streets[j]) and agree)]
+        left += [i for i, _ in pairs]
+        right += [j for _, j in pairs]
+    return np.asarray(left, dtype=np.int64), np.asarray(right, dtype=np.int64)
+
+def canonical_links(df: pd.DataFrame) -> pd.Series:
+    """CANONICAL_COL for every row of a scraper frame (rows without a Link keep None)."""
+    links = _column(df, "Link")
+    unit, uniques = pd.factorize(links)  # one unit per Link, -1 = no Link
+    first = pd.Series(np.arange(len(df))).groupby(unit).first()
+    first = first[first.index >= 0]
+    units = pd.DataFrame({col: _column(df, col).to_numpy()[first.to_numpy()]
+                          for col in ("Zemes Numurs", "Pilseta/Pagasts", "Platiba m2", "Cena EUR", "Iela")})
+    units["cadastre"] = units["Zemes Numurs"].map(cadastre_key)
+    n = len(units)
+
+    # same cadastre number -> the number's first unit
+    numbered = units["cadastre"].notna().to_numpy()
+    cad_code = np.full(n, -1)
+    cad_code[numbered] = pd.factorize(units["cadastre"][numbered])[0]
+    cad_first = pd.Series(np.flatnonzero(numbered)).groupby(cad_code[numbered]).first().to_numpy()
+    a_cad = np.flatnonzero(numbered)
+    b_cad = cad_first[cad_code[a_cad]]
+
+    # blocks: unnumbered ads among themselves, then whole groups of them onto a number
+    a, b = _block_pairs(units, numbered)
+    loose = ~numbered[a] & ~numbered[b]
+    groups = _components(n, a[loose], b[loose])
+    i, j = a[~loose], b[~loose]
+    free = np.where(numbered[i], j, i)
+    number = cad_code[np.where(numbered[i], i, j)]
+    links_to = pd.DataFrame({"group": groups[free], "number": number}).drop_duplicates()
+    sole = links_to.groupby("group")["number"].transform("size").to_numpy() == 1
+    a_att = links_to["group"].to_numpy()[sole]
+    b_att = cad_first[links_to["number"].to_numpy()[sole]]
+
+    labels = _components(n, np.concatenate([a_cad, a[loose], a_att]).astype(np.int64),
+                         np.concatenate([b_cad, b[loose], b_att]).astype(np.int64))
+    canonical = np.asarray(uniques, dtype=object)[labels]  # units are numbered in frame order
+    out = np.full(len(df), None, dtype=object)
+    has = unit >= 0
+    out[has] = canonical[unit[has]]
+    return pd.Series(out, index=df.index, name=CANONICAL_COL)
+
+def dedupe(df: pd.DataFrame) -> pd.DataFrame:
+    """Copy of df with CANONICAL_COL (see canonical_links)."""
+    return df.assign(**{CANONICAL_COL: canonical_links(df)})
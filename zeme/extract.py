@@ -0,0 +1,135 @@
+# zeme/extract.py
+# Fast ad-page field extractor (lxml + one XPath pass).
+# Returns the same values as the BeautifulSoup path in parse_ad_details:
+#   extract_text_by_id(soup, id) -> el.get_text(strip=True)
+#   extract_datums(soup)         -> date from the first "Datums:" string's parent
+# Scrapers fall back to BeautifulSoup if extraction fails.
+# lxml is already required: BeautifulSoup(..., "lxml") uses it as its parser.
+
+import re
+
+import lxml.html
+from lxml import etree
+
+# Output column -> element id on the ad page (order = output dict order)
+AD_FIELDS = {
+    "Pilseta":         "tdo_20",    # City
+    "Pilseta/Pagasts": "tdo_856",   # City/Parish
+    "Iela":            "tdo_11",    # Street
+    "Ciems":           "tdo_368",   # Village
+    "Platiba":         "tdo_3",     # Area (raw text)
+    "Cena":            "tdo_8",     # Price (raw text)
+    "Zemes Tips":      "tdo_228",   # Land usage/type
+    "Zemes Numurs":    "tdo_1631",  # Cadastral/land number
+}
+
+_DATUMS_RX = re.compile(r"\bDatums:")
+_DATE_RX   = re.compile(r"(\d{2}\.\d{2}\.\d{4}\.|\d{4}-\d{2}-\d{2})")
+_SKIP_TEXT = {"script", "style", "template"}  # BeautifulSoup get_text() ignores these
+
+# Every wanted element and every candidate "Datums:" text node, in document order
+_XPATH = etree.XPath(
+    "|".join(f'//*[@id="{el_id}"]' for el_id in AD_FIELDS.values())
+    + '|//text()[contains(., "Datums:")]'
+)
+
+def _strings(el):
+    """Text nodes under el in document order (comments/scripts skipped, like bs4)."""
+    if isinstance(el.tag, str) and el.tag not in _SKIP_TEXT and el.text:
+        yield el.text
+    for child in el:
+        yield from _strings(child)
+        if child.tail:
+            yield child.tail
+
+def _text(el, sep=""):
+    return sep.join(s for s in (t.strip() for t in _strings(el)) if s)
+
+def extract_ad_fields(html: str, default="NA") -> dict:
+    """All AD_FIELDS plus "Datums" from one ad page (no "Link")."""
+    doc = lxml.html.fromstring(html)
+    by_id, datums = {}, None
+    for node in _XPATH(doc):
+        if isinstance(node, str):
+            if datums is None and _DATUMS_RX.search(node):
+                parent = node.getparent()
+                if parent is not None and node.is_tail:
+                    parent = parent.getparent()
+                datums = _text(parent, " ") if parent is not None else str(node)
+        else:
+            by_id.setdefault(node.get("id"), node)
+
+    out = {}
+    for col, el_id in AD_FIELDS.items():
+        el = by_id.get(el_id)
+        out[col] = _text(el) if el is not None else default
+    if datums is None:
+        out["Datums"] = default
+    else:
+        m = _DATE_RX.search(datums)
+        out["Datums"] = m.group(1) if m else datums
+    return out
+
+# -------------------------------
+# Listing rows (tr_* on /sell/ pages)
+# -------------------------------
+# Column header label (lowercase substring) -> output column; first match wins
+LISTING_HEADERS = (
+    ("tips",    "Zemes Tips"),
+    ("pielieto", "Zemes Tips"),
+    ("pagast",  "Pilseta/Pagasts"),
+    ("pilsēta", "Pilseta"),
+    ("ciems",   "Ciems"),
+    ("iela",    "Iela"),
+    ("m2",      "Platiba"),
+    ("m²",      "Platiba"),
+    ("platība", "Platiba"),
+    ("ha",      "Platiba"),
+    ("cena",    "Cena"),
+)
+# Ad-page columns in parse_ad_details order (listing-only rows fill the rest with "NA")
+AD_COLUMNS = ["Link", *AD_FIELDS, "Datums"]
+
+def _listing_header(row):
+    """Data-column labels from the table's head_line row (after the 3 ad cells)."""
+    table = row.find_parent("table")
+    head = table.find("tr", id="head_line") if table else None
+    if head is None:
+        return None
+    return [td.get_text(" ", strip=True).lower() for td in head.find_all("td")[1:]]
+
+def _listing_column(label):
+    for key, col in LISTING_HEADERS:
+        if key in label:
+            return col
+    return None
+
+def listing_row_record(row, base):
+    """
+    Listing row -> {"Link", "Apraksts", + any of Zemes Tips, Pilseta/Pagasts, Pilseta,
+    Ciems, Iela, Platiba, Cena}. Raw texts as listed ("1,200 m²", "25,000 €"); the
+    ad-page parsers read their thousands separators too. None if the row has no ad link.
+    """
+    tds = row.find_all("td")
+    if len(tds) < 3:
+        return None
+    a = tds[1].find("a", href=True)
+    if not a:
+        return None
+    rec = {"Link": base + a["href"], "Apraksts": " ".join(tds[2].get_text(" ", strip=True).split())}
+
+    cells = [" ".join(td.get_text(" ", strip=True).split()) for td in tds[3:]]
+    header = _listing_header(row)
+    if header and len(header) == len(cells):
+        labelled = [(_listing_column(label), label, text) for label, text in zip(header, cells)]
+    elif len(cells) >= 2:  # unknown layout: area and price are the last two columns
+        labelled = [("Platiba", "", cells[-2]), ("Cena", "", cells[-1])]
+    else:
+        labelled = []
+    for col, label, text in labelled:
+        if not col or col in rec:
+            continue
+        if col == "Platiba" and text and not re.search(r"[^\d\s.,]", text):
+            text = f"{text} {'ha' if 'ha' in label else 'm²'}"  # unit only in the header
+        rec[col] = text
+    return rec
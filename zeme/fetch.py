@@ -0,0 +1,264 @@
+# zeme/fetch.py
+# Concurrent fetch engine used by phase 2 of the scraper.
+# asyncio schedules the work; each fetch runs the scraper's blocking callable
+# (e.g. parse_ad_details) in a worker thread, so every request still goes through
+# sess() and its HTTPAdapter(max_retries=_make_retry()) -> same 429/5xx backoff.
+# fetch_parse_all splits download and parse: pages are downloaded in threads and
+# parsed in a process pool, so parsing neither holds the GIL nor stalls the network.
+
+import asyncio
+import time
+from concurrent.futures import BrokenExecutor, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+# Tunables (defaults; zeme.scraper passes its own)
+CONCURRENCY    = 8      # max in-flight requests overall
+PER_HOST_LIMIT = 4      # max in-flight requests per host
+HOST_DELAY     = 0.10   # min spacing between request starts on the same host
+QUEUE_SIZE     = 64     # downloaded pages waiting for a parser (fetch_parse_all)
+
+# -------------------------------
+# Per-host politeness budget
+# -------------------------------
+class _HostBudget:
+    """Caps in-flight requests to one host and spaces request starts by `delay`."""
+
+    def __init__(self, limit: int, delay: float):
+        self._sem = asyncio.Semaphore(limit)
+        self._lock = asyncio.Lock()
+        self._delay = delay
+        self._next_start = 0.0
+
+    async def __aenter__(self):
+        await self._sem.acquire()
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            wait = self._next_start - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_start = loop.time() + self._delay
+        return self
+
+    async def __aexit__(self, *exc):
+        self._sem.release()
+        return False
+
+# -------------------------------
+# Engine
+# -------------------------------
+async def _gather_bounded(coros, window):
+    """Await coroutines with at most `window` scheduled at once (tasks are made lazily)."""
+    slots = asyncio.Semaphore(window)
+    pending = set()
+    failed = []
+
+    def finished(task):
+        pending.discard(task)
+        slots.release()
+        if not task.cancelled() and task.exception() is not None:
+            failed.append(task.exception())
+
+    coros = iter(coros)
+    try:
+        while True:
+            await slots.acquire()  # before making the next coroutine: none is left un-awaited
+            coro = None if failed else next(coros, None)
+            if coro is None:
+                break
+            task = asyncio.create_task(coro)
+            pending.add(task)
+            task.add_done_callback(finished)
+        await asyncio.gather(*pending)
+    except asyncio.CancelledError:
+        for task in list(pending):
+            task.cancel()
+        raise
+    if failed:
+        raise failed[0]
+
+async def fetch_all_async(urls, fetch, concurrency=CONCURRENCY, per_host=PER_HOST_LIMIT,
+                          host_delay=HOST_DELAY, on_done=None, on_result=None, keep=True):
+    """
+    Run fetch(url) for every url with bounded concurrency.
+    Returns: list of (url, result) in input order; result is the exception if fetch raised.
+    on_result(url, result) is called as each fetch completes (completion order);
+    on_done(n_done, n_total) is called after it (progress hook).
+    keep=False: results are only handed to on_result (not held for the return value) -> [],
+                and only a few tasks per worker exist at a time, so memory does not grow with urls.
+    """
+    urls = list(urls)
+    if not urls:
+        return []
+    loop = asyncio.get_running_loop()
+    gate = asyncio.Semaphore(concurrency)
+    hosts = {}
+    done = 0
+
+    def budget(url):
+        host = urlsplit(url).netloc
+        if host not in hosts:
+            hosts[host] = _HostBudget(per_host, host_delay)
+        return hosts[host]
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        async def one(url):
+            nonlocal done
+            async with gate, budget(url):
+                try:
+                    result = await loop.run_in_executor(pool, fetch, url)
+                except Exception as e:
+                    result = e
+            done += 1
+            if on_result:
+                on_result(url, result)
+            if on_done:
+                on_done(done, len(urls))
+            return (url, result) if keep else None
+
+        if keep:
+            return await asyncio.gather(*(one(u) for u in urls))
+        await _gather_bounded((one(u) for u in urls), 4 * concurrency)
+        return []
+
+def run_sync(coro):
+    """asyncio.run() that also works from an already-running loop (Jupyter / #%% cells)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        return ex.submit(asyncio.run, coro).result()
+
+def fetch_all(urls, fetch, **kwargs):
+    """Blocking wrapper around fetch_all_async (same arguments)."""
+    return run_sync(fetch_all_async(urls, fetch, **kwargs))
+
+# -------------------------------
+# Download -> parse pipeline
+# -------------------------------
+async def fetch_parse_all_async(urls, download, parse, parse_pool=None, parsers=1,
+                                queue_size=QUEUE_SIZE, concurrency=CONCURRENCY,
+                                per_host=PER_HOST_LIMIT, host_delay=HOST_DELAY,
+                                on_done=None, on_result=None, on_timing=None, on_broken=None, keep=True):
+    """
+    Two-stage fetch_all_async: download(url) runs in worker threads, then
+    parse(url, page) runs in parse_pool (e.g. a ProcessPoolExecutor; picklable
+    callables and pages) with up to `parsers` parses in flight.
+    Downloaded pages wait in a queue of at most queue_size; while it is full,
+    downloads pause, so at most queue_size + concurrency pages are held in memory.
+    parse_pool=None parses in the download thread (plain fetch_all_async).
+    Returns / hooks as fetch_all_async; a failed download or parse yields its exception,
+    an exception from a hook (on_result, on_done) stops the run and is raised.
+    on_timing(stage, seconds) is called per page with stage "download" and "parse".
+    If parse_pool breaks (a worker process died), on_broken(error) is called once and
+    the remaining pages are parsed in the download threads.
+    """
+    urls = list(urls)
+    timing = on_timing or (lambda stage, seconds: None)
+
+    def timed(stage, func, *args):
+        t0 = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            timing(stage, time.perf_counter() - t0)
+
+    if parse_pool is None:
+        def fetch(url):
+            return timed("parse", parse, url, timed("download", download, url))
+        return await fetch_all_async(urls, fetch,
+                                     concurrency=concurrency, per_host=per_host, host_delay=host_delay,
+                                     on_done=on_done, on_result=on_result, keep=keep)
+    if not urls:
+        return []
+    loop = asyncio.get_running_loop()
+    gate = asyncio.Semaphore(concurrency)
+    queue = asyncio.Queue(maxsize=queue_size)
+    hosts = {}
+    results = {}
+    done = 0
+    executor = parse_pool
+
+    def budget(url):
+        host = urlsplit(url).netloc
+        if host not in hosts:
+            hosts[host] = _HostBudget(per_host, host_delay)
+        return hosts[host]
+
+    def finish(url, result):
+        nonlocal done
+        if keep:
+            results[url] = result
+        done += 1
+        if on_result:
+            on_result(url, result)
+        if on_done:
+            on_done(done, len(urls))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        async def fetcher(url):
+            async with gate:
+                async with budget(url):
+                    try:
+                        page = await loop.run_in_executor(pool, timed, "download", download, url)
+                    except Exception as e:
+                        finish(url, e)
+                        return
+                await queue.put((url, page))  # blocks while parsers are behind
+
+        async def parse_page(url, page):
+            nonlocal executor
+            try:
+                return await loop.run_in_executor(executor, parse, url, page)
+            except BrokenExecutor as e:
+                # not this page's fault: every later parse would fail the same way
+                if executor is not pool:
+                    executor = pool
+                    if on_broken:
+                        on_broken(e)
+                return await loop.run_in_executor(pool, parse, url, page)
+
+        failure = loop.create_future()  # first exception raised by a hook in a parser
+
+        async def parser():
+            while True:
+                url, page = await queue.get()
+                try:
+                    t0 = time.perf_counter()
+                    try:
+                        result = await parse_page(url, page)
+                    except Exception as e:
+                        result = e
+                    timing("parse", time.perf_counter() - t0)
+                    finish(url, result)
+                except Exception as e:
+                    if not failure.done():
+                        failure.set_exception(e)
+                finally:
+                    queue.task_done()  # else queue.join() would wait forever
+
+        async def feed():
+            if keep:
+                await asyncio.gather(*(fetcher(u) for u in urls))
+            else:
+                await _gather_bounded((fetcher(u) for u in urls), 4 * concurrency)
+            await queue.join()
+
+        workers = [asyncio.create_task(parser()) for _ in range(max(1, parsers))]
+        feeding = asyncio.create_task(feed())
+        try:
+            await asyncio.wait([feeding, failure], return_when=asyncio.FIRST_COMPLETED)
+            if failure.done():
+                feeding.cancel()  # stop the fetchers, then raise the hook's error
+                await asyncio.gather(feeding, return_exceptions=True)
+                failure.result()
+            await feeding
+        finally:
+            feeding.cancel()
+            for w in workers:
+                w.cancel()
+    return [(url, results[url]) for url in urls] if keep else []
+
+def fetch_parse_all(urls, download, parse, **kwargs):
+    """Blocking wrapper around fetch_parse_all_async (same arguments)."""
+    return run_sync(fetch_parse_all_async(urls, download, parse, **kwargs))
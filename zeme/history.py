@@ -0,0 +1,200 @@
+# zeme/history.py
+# Listing history: one SQLite database every run's output is ingested into.
+#   listings  one row per Link: Zemes Numurs, location, type, current price / area,
+#             first_seen / last_seen (run dates)
+#   versions  price / area per Link as first seen and after every change
+#             (valid_from = run date); unchanged runs add nothing
+#   runs      ingested run dates with their row / new / changed counts
+# Indexed on region, Zemes Tips, Zemes Numurs and the dates, so price histories and
+# "what changed" queries stay sub-second over years of daily runs.
+# Runs are ingested in date order (re-ingesting the latest date is fine).
+
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+from .snapshot import DATE_COL, DELISTED_COL, read_snapshots, snapshot_dates
+
+# output column -> SQL column
+FIELDS  = {"Link": "link", "Zemes Numurs": "zemes_numurs", "Pilseta": "pilseta",
+           "Pilseta/Pagasts": "pagasts", "Ciems": "ciems", "Iela": "iela", "Zemes Tips": "zemes_tips"}
+TRACKED = {"Cena EUR": "cena_eur", "Cena m2": "cena_m2", "Platiba m2": "platiba_m2", "Platiba ha": "platiba_ha"}
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS listings (
+    link TEXT PRIMARY KEY, {", ".join(f"{c} TEXT" for c in list(FIELDS.values())[1:])},
+    {", ".join(f"{c} REAL" for c in TRACKED.values())},
+    first_seen TEXT NOT NULL, last_seen TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    link TEXT NOT NULL, valid_from TEXT NOT NULL,
+    {", ".join(f"{c} REAL" for c in TRACKED.values())},
+    PRIMARY KEY (link, valid_from)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS runs (
+    date TEXT PRIMARY KEY, rows INTEGER NOT NULL, new INTEGER NOT NULL, changed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS listings_region     ON listings (pilseta, pagasts);
+CREATE INDEX IF NOT EXISTS listings_type       ON listings (zemes_tips);
+CREATE INDEX IF NOT EXISTS listings_cadastre   ON listings (zemes_numurs);
+CREATE INDEX IF NOT EXISTS listings_first_seen ON listings (first_seen);
+CREATE INDEX IF NOT EXISTS listings_last_seen  ON listings (last_seen);
+CREATE INDEX IF NOT EXISTS versions_date       ON versions (valid_from);
+"""
+
+_COLS    = [*FIELDS.values(), *TRACKED.values()]
+_CHANGED = " OR ".join(f"s.{c} IS NOT l.{c}" for c in TRACKED.values())
+
+def _text_values(s):
+    s = s.astype(str).where(s.notna(), "NA")
+    return s.astype(object).where(s.ne("NA"), None).tolist()
+
+def _number_values(s):
+    s = pd.to_numeric(s, errors="coerce").astype("float64")
+    return s.astype(object).where(s.notna(), None).tolist()
+
+def _run_date(df):
+    if DATE_COL in df.columns and df[DATE_COL].notna().any():
+        return str(df[DATE_COL].dropna().astype(str).max())
+    return datetime.today().strftime("%Y-%m-%d")
+
+class ListingHistory:
+    def __init__(self, path):
+        self.path = path
+        self._con = sqlite3.connect(path)
+        self._con.executescript(_SCHEMA)
+
+    def close(self):
+        self._con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _query(self, sql, params=()):
+        return pd.read_sql_query(sql, self._con, params=params)
+
+    # ---------- ingest ----------
+    def last_run(self):
+        """Latest ingested run date, or None."""
+        return self._con.execute("SELECT max(date) FROM runs").fetchone()[0]
+
+    def ingest(self, df: pd.DataFrame, date=None) -> dict:
+        """
+        Upsert one run's output (a scraper frame; rows with Delisted set are not counted
+        as seen). date: run date, default the frame's latest "Datu iev." (else today).
+        -> {"rows", "new", "changed"}
+        """
+        date = date or _run_date(df)
+        last = self.last_run()
+        if last is not None and date < last:
+            raise ValueError(f"Run {date} is older than the last ingested run {last}; ingest in date order")
+        if DELISTED_COL in df.columns:
+            df = df[df[DELISTED_COL].isna()]
+        df = df[df["Link"].notna()].drop_duplicates(subset=["Link"], keep="first")
+        none = [None] * len(df)
+        rows = list(zip(*[_text_values(df[col]) if col in df.columns else none for col in FIELDS],
+                        *[_number_values(df[col]) if col in df.columns else none for col in TRACKED]))
+
+        con = self._con
+        with con:
+            con.execute(f"CREATE TEMP TABLE IF NOT EXISTS stage ({', '.join(_COLS)})")
+            con.execute("DELETE FROM stage")
+            con.executemany(f"INSERT INTO stage VALUES ({', '.join('?' * len(_COLS))})", rows)
+            new, changed = con.execute(
+                f"SELECT coalesce(sum(l.link IS NULL), 0), "
+                f"       coalesce(sum(l.link IS NOT NULL AND ({_CHANGED})), 0) "
+                f"FROM stage s LEFT JOIN listings l ON l.link = s.link").fetchone()
+            tracked = ", ".join(TRACKED.values())
+            con.execute(
+                f"INSERT OR REPLACE INTO versions (link, valid_from, {tracked}) "
+                f"SELECT s.link, ?, {', '.join(f's.{c}' for c in TRACKED.values())} "
+                f"FROM stage s LEFT JOIN listings l ON l.link = s.link "
+                f"WHERE l.link IS NULL OR {_CHANGED}", (date,))
+            con.execute(
+                f"INSERT INTO listings ({', '.join(_COLS)}, first_seen, last_seen) "
+                f"SELECT {', '.join(_COLS)}, ?, ? FROM stage WHERE true "
+                f"ON CONFLICT (link) DO UPDATE SET "
+                + ", ".join(f"{c} = excluded.{c}" for c in _COLS[1:])
+                + ", last_seen = excluded.last_seen", (date, date))
+            con.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?)", (date, len(rows), new, changed))
+        return {"rows": len(rows), "new": new, "changed": changed}
+
+    def ingest_store(self, root) -> dict:
+        """Ingest the dates of a Parquet snapshot store newer than the last ingested run."""
+        last = self.last_run()
+        counts = {}
+        for date in snapshot_dates(root):
+            if last is None or date > last:
+                counts[date] = self.ingest(read_snapshots(root, start=date, end=date), date)
+        return counts
+
+    # ---------- queries ----------
+    def price_history(self, link) -> pd.DataFrame:
+        """Price / area versions of one ad, oldest first."""
+        return self._query(
+            "SELECT valid_from, " + ", ".join(f'{c} AS "{col}"' for col, c in TRACKED.items())
+            + " FROM versions WHERE link = ? ORDER BY valid_from", (link,))
+
+    def by_cadastre(self, zemes_numurs) -> pd.DataFrame:
+        """Every ad (current values) listed for one cadastral number."""
+        return self._listings(["l.zemes_numurs = ?"], [str(zemes_numurs)])
+
+    def listings(self, regions=None, zemes_tips=None, seen_since=None) -> pd.DataFrame:
+        """
+        Current values of the ads, filtered by Pilseta (regions), Zemes Tips and
+        last_seen >= seen_since; columns use the scraper's names.
+        """
+        clauses, params = _filters(regions, zemes_tips)
+        if seen_since:
+            clauses.append("l.last_seen >= ?")
+            params.append(seen_since)
+        return self._listings(clauses, params)
+
+    def _listings(self, clauses, params):
+        cols = ", ".join(f'l.{c} AS "{col}"' for col, c in {**FIELDS, **TRACKED}.items())
+        return self._query(f"SELECT {cols}, l.first_seen, l.last_seen FROM listings l"
+                           + (" WHERE " + " AND ".join(clauses) if clauses else "")
+                           + " ORDER BY l.first_seen, l.link", params)
+
+    def changes(self, start=None, end=None, regions=None, zemes_tips=None) -> pd.DataFrame:
+        """
+        Price / area changes (not first sightings) with valid_from in [start, end],
+        each with the previous values ("<column> prev").
+        """
+        clauses, params = _filters(regions, zemes_tips)
+        # previous values over all versions of the ads changed in the date window
+        window, dates = [], []
+        if start:
+            window.append("valid_from >= ?")
+            dates.append(start)
+        if end:
+            window.append("valid_from <= ?")
+            dates.append(end)
+        if window:
+            clauses.append(f"v.link IN (SELECT link FROM versions WHERE {' AND '.join(window)})")
+            params += dates
+        outer = ["valid_from > first_seen", *window]
+        params += dates
+        cur = ", ".join(f'v.{c} AS "{col}"' for col, c in TRACKED.items())
+        prev = ", ".join(f'lag(v.{c}) OVER w AS "{col} prev"' for col, c in TRACKED.items())
+        sql = (f'SELECT * FROM (SELECT v.link AS "Link", l.pilseta AS "Pilseta", '
+               f'l.zemes_tips AS "Zemes Tips", v.valid_from, l.first_seen, {cur}, {prev} '
+               f"FROM versions v JOIN listings l ON l.link = v.link"
+               + (" WHERE " + " AND ".join(clauses) if clauses else "")
+               + " WINDOW w AS (PARTITION BY v.link ORDER BY v.valid_from))"
+               + " WHERE " + " AND ".join(outer) + ' ORDER BY valid_from, "Link"')
+        return self._query(sql, params).drop(columns="first_seen")
+
+def _filters(regions, zemes_tips):
+    clauses, params = [], []
+    for col, values in (("pilseta", regions), ("zemes_tips", zemes_tips)):
+        if values is not None:
+            values = list(values)
+            clauses.append(f"l.{col} IN ({', '.join('?' * len(values))})")
+            params += values
+    return clauses, params
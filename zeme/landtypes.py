@@ -0,0 +1,40 @@
+# zeme/landtypes.py
+# Persistent ad link -> Zemes Tips index (JSON file).
+# An ad's land type does not change, so once an ad page or a listing row with a
+# type column has shown it, profiles filtering on Zemes Tips drop the ad before
+# requesting it on later runs instead of fetching it only to filter it out.
+
+import json
+import os
+
+class LandTypeIndex:
+    def __init__(self, path=None):
+        self.path = path
+        self._types = {}
+        self._dirty = False
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._types = json.load(f)
+
+    def __len__(self):
+        return len(self._types)
+
+    def get(self, link):
+        return self._types.get(link)
+
+    def update(self, rows):
+        """Learn from detail dicts / listing records that carry a Zemes Tips value."""
+        for row in rows:
+            tips = row.get("Zemes Tips")
+            if tips and tips != "NA" and self._types.get(row["Link"]) != tips:
+                self._types[row["Link"]] = tips
+                self._dirty = True
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._types, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self._dirty = False
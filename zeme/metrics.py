@@ -0,0 +1,157 @@
+# zeme/metrics.py
+# Instrumentation for one scrape run.
+#   stages:  wall-clock seconds per pipeline stage (discovery, listing_fetch, ad_fetch, normalize)
+#   work:    seconds summed over workers (download = network threads, parse = parse pool)
+#   counters: responses, cache hits / revalidations, network requests, bytes, retries, 429/503
+#   latency: histogram of network response times (requests' resp.elapsed)
+# Reported as JSON (metrics.json in the run directory) and, optionally, as a
+# Prometheus text file (e.g. for node_exporter's textfile collector).
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds, upper bounds
+THROTTLE_STATUS = {429, 503}
+
+class RunMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self.stages = defaultdict(float)
+            self.work = defaultdict(float)
+            self.counters = defaultdict(int)
+            self.latency_counts = [0] * (len(LATENCY_BUCKETS) + 1)  # last = +Inf
+            self.latency_sum = 0.0
+            self.gauges = {}
+            self.outputs = {}
+
+    # ---------- recording ----------
+    @contextmanager
+    def stage(self, name):
+        """Time a block as pipeline stage `name` (re-entering a stage adds up)."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stages[name] += time.perf_counter() - t0
+
+    def add_work(self, name, seconds):
+        """fetch_parse_all on_timing hook (called from worker threads)."""
+        with self._lock:
+            self.work[name] += seconds
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def output(self, profile, rows):
+        with self._lock:
+            self.outputs[profile] = rows
+
+    def observe_response(self, resp, *args, **kwargs):
+        """requests response hook: one call per response, redirect hops included."""
+        from_cache = getattr(resp, "from_cache", False)
+        revalidated = getattr(resp, "revalidated", False)
+        retries = getattr(getattr(resp, "raw", None), "retries", None)
+        retried = [h.status for h in getattr(retries, "history", ()) or () if h.status]
+        with self._lock:
+            c = self.counters
+            c["responses"] += 1
+            if from_cache and not revalidated:
+                c["cache_hits"] += 1
+                return
+            c["network_requests"] += 1
+            if revalidated:
+                c["cache_revalidated"] += 1
+            else:
+                c["bytes_downloaded"] += len(resp.content or b"")
+            c["retries"] += len(retried)
+            c["throttled"] += sum(s in THROTTLE_STATUS for s in retried) + (resp.status_code in THROTTLE_STATUS)
+            if resp.status_code >= 400:
+                c["http_errors"] += 1
+            latency = resp.elapsed.total_seconds()
+            self.latency_sum += latency
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    self.latency_counts[i] += 1
+                    break
+            else:
+                self.latency_counts[-1] += 1
+
+    # ---------- reporting ----------
+    def report(self) -> dict:
+        with self._lock:
+            c = dict(self.counters)
+            responses = c.get("responses", 0)
+            cumulative, total = {}, 0
+            for bound, n in zip((*LATENCY_BUCKETS, "+Inf"), self.latency_counts):
+                total += n
+                cumulative[str(bound)] = total
+            return {
+                "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+                "elapsed_s": round(time.time() - self.started_at, 3),
+                "stages_s": {k: round(v, 3) for k, v in self.stages.items()},
+                "work_s": {k: round(v, 3) for k, v in self.work.items()},
+                "counters": c,
+                "cache_hit_ratio": round(c.get("cache_hits", 0) / responses, 4) if responses else None,
+                "latency_s": {"buckets": cumulative, "sum": round(self.latency_sum, 3), "count": total},
+                "gauges": dict(self.gauges),
+                "outputs": dict(self.outputs),
+            }
+
+    def summary(self) -> str:
+        r = self.report()
+        c = r["counters"]
+        stages = ", ".join(f"{k}={v:.1f}s" for k, v in r["stages_s"].items())
+        hit = f"{r['cache_hit_ratio']:.0%}" if r["cache_hit_ratio"] is not None else "n/a"
+        return (f"requests={c.get('responses', 0)} (network {c.get('network_requests', 0)}, "
+                f"cache hits {hit}), MB={c.get('bytes_downloaded', 0) / 1e6:.1f}, "
+                f"retries={c.get('retries', 0)}, throttled={c.get('throttled', 0)}; {stages}")
+
+    def write_json(self, path):
+        _atomic_write(path, json.dumps(self.report(), ensure_ascii=False, indent=2))
+
+    def write_prometheus(self, path, prefix="zeme_scrape"):
+        r = self.report()
+        lines = []
+
+        def metric(name, kind, samples):
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{prefix}_{name}{labels} {value}")
+
+        metric("stage_seconds", "gauge", [(f'{{stage="{k}"}}', v) for k, v in r["stages_s"].items()])
+        metric("work_seconds", "gauge", [(f'{{stage="{k}"}}', v) for k, v in r["work_s"].items()])
+        for name, value in sorted(r["counters"].items()):
+            metric(f"{name}_total", "counter", [("", value)])
+        lat = r["latency_s"]
+        metric("request_latency_seconds", "histogram",
+               [(f'_bucket{{le="{le}"}}', n) for le, n in lat["buckets"].items()])
+        lines.append(f"{prefix}_request_latency_seconds_sum {lat['sum']}")
+        lines.append(f"{prefix}_request_latency_seconds_count {lat['count']}")
+        if r["cache_hit_ratio"] is not None:
+            metric("cache_hit_ratio", "gauge", [("", r["cache_hit_ratio"])])
+        for name, value in sorted(r["gauges"].items()):
+            metric(name, "gauge", [("", value)])
+        metric("output_rows", "gauge", [(f'{{profile="{k}"}}', v) for k, v in r["outputs"].items()])
+        metric("run_timestamp_seconds", "gauge", [("", int(self.started_at))])
+        _atomic_write(path, "\n".join(lines) + "\n")
+
+def _atomic_write(path, text):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
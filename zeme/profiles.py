@@ -0,0 +1,96 @@
+# zeme/profiles.py
+# Filter profiles: which regions and land types one scraper output keeps, plus its
+# post-processing. Several profiles share one scrape (see scraper.run_profiles).
+# Profiles are loaded from
+#   - a filters file like Collection_filters.txt: blocks separated by blank lines,
+#     first block = Zemes Tips values, second block = regions ("#" starts a comment)
+#   - a TOML file with one [profiles.<name>] table per profile:
+#       regions            region URL slugs ("riga-region") or names ("Rīgas rajons"); omit = all
+#       zemes_tips         tdo_228 "Zemes Tips" values (case-insensitive); omit = all
+#       filters            filters file to take regions / zemes_tips from (relative to the TOML)
+#       tidy               strip "[Karte]" / "Datums:" noise from Iela / Datums
+#       require_price_area drop rows without a parsed price or area
+#       snapshot           previous output (CSV or Parquet store, relative to the TOML)
+#                          -> incremental / hybrid runs
+#       new_only           only ads no earlier run (any profile) fetched (see zeme.seen)
+
+import os
+
+try:
+    import tomllib  # Python 3.11+
+except ImportError:
+    tomllib = None
+
+class Profile:
+    def __init__(self, name, regions=None, zemes_tips=None, tidy=False,
+                 require_price_area=False, snapshot=None, new_only=False):
+        self.name = name
+        self.regions = None if regions is None else frozenset(regions)
+        self.zemes_tips = None if zemes_tips is None else frozenset(zemes_tips)
+        self._tips_lower = None if zemes_tips is None else {t.lower() for t in zemes_tips}
+        self.tidy = tidy
+        self.require_price_area = require_price_area
+        self.snapshot = snapshot
+        self.new_only = new_only
+
+    def __repr__(self):
+        return (f"Profile({self.name!r}, regions={sorted(self.regions) if self.regions else None}, "
+                f"zemes_tips={sorted(self.zemes_tips) if self.zemes_tips else None})")
+
+    def wants_region(self, slug, name=None):
+        """True if the region (URL slug, and display name when known) is in the profile."""
+        return self.regions is None or slug in self.regions or (name is not None and name in self.regions)
+
+    def wants_type(self, zemes_tips):
+        """False only if the land type is known and not in the profile."""
+        return self._tips_lower is None or zemes_tips is None or zemes_tips.lower() in self._tips_lower
+
+def read_filters_file(path):
+    """Collection_filters.txt-style file -> {"zemes_tips": [...], "regions": [...]}."""
+    blocks, block = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                block.append(line)
+            elif block:
+                blocks.append(block)
+                block = []
+    if block:
+        blocks.append(block)
+    if len(blocks) > 2:
+        raise ValueError(f"{path}: expected at most 2 blocks (Zemes Tips, regions), found {len(blocks)}")
+    blocks += [None] * (2 - len(blocks))
+    return {"zemes_tips": blocks[0], "regions": blocks[1]}
+
+def _profile_from_table(name, table, base_dir):
+    table = dict(table)
+    filters = table.pop("filters", None)
+    if filters:
+        from_file = read_filters_file(os.path.join(base_dir, filters))
+        for key, values in from_file.items():
+            table.setdefault(key, values)
+    if table.get("snapshot"):
+        table["snapshot"] = os.path.join(base_dir, table["snapshot"])
+    unknown = set(table) - {"regions", "zemes_tips", "tidy", "require_price_area", "snapshot", "new_only"}
+    if unknown:
+        raise ValueError(f"profile {name!r}: unknown keys {sorted(unknown)}")
+    return Profile(name, **table)
+
+def load_profiles(path):
+    """
+    Profiles from a TOML file ({name: Profile} in file order), or a single profile
+    named after a filters file (e.g. Collection_filters.txt -> "Collection_filters").
+    """
+    if not path.endswith(".toml"):
+        name = os.path.splitext(os.path.basename(path))[0]
+        return {name: Profile(name, **read_filters_file(path))}
+    if tomllib is None:
+        raise ImportError("TOML profiles need Python 3.11+ (tomllib)")
+    with open(path, "rb") as f:
+        config = tomllib.load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    tables = config.get("profiles", {})
+    if not tables:
+        raise ValueError(f"{path}: no [profiles.<name>] tables")
+    return {name: _profile_from_table(name, table, base_dir) for name, table in tables.items()}
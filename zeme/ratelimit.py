@@ -0,0 +1,105 @@
+# zeme/ratelimit.py
+# Adaptive token-bucket rate limiter shared by every request of a scraper run
+# (discovery threads and phase 2 fetch workers alike).
+#   - tokens refill at `rate` requests/second; each network request takes one
+#   - healthy, fast responses raise the rate additively (up to max_rate)
+#   - 429/503, Retry-After and retries inside urllib3 halve it (down to min_rate);
+#     Retry-After also pauses all requests for the given number of seconds
+#   - latency well above the best seen so far trims it gently
+# RateLimitedAdapter applies it under sess(); cached responses never take a token.
+
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+
+THROTTLE_STATUS = {429, 503}
+
+class AdaptiveRateLimiter:
+    def __init__(self, rate=10.0, min_rate=0.5, max_rate=20.0, burst=2.0,
+                 increase=0.05, latency_factor=2.0):
+        self.rate = float(rate)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.burst = float(burst)
+        self.increase = increase              # rps added per healthy response
+        self.latency_factor = latency_factor  # "slow" = EWMA latency > factor * best
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._latency = None                  # EWMA of response latency (s)
+        self._best_latency = None
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                else:
+                    wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def feedback(self, status=None, latency=None, retry_after=None, retried=()):
+        """
+        Report one finished request.
+        status:      final HTTP status (None = transport error / retries exhausted)
+        latency:     seconds to response headers
+        retry_after: seconds from a Retry-After header
+        retried:     statuses urllib3 retried before the final response
+        """
+        with self._lock:
+            throttled = (status is None or status in THROTTLE_STATUS or retry_after
+                         or any(s in THROTTLE_STATUS for s in retried))
+            if throttled:
+                self.rate = max(self.min_rate, self.rate * 0.5)
+                if retry_after:
+                    self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+                return
+            if status >= 500:
+                self.rate = max(self.min_rate, self.rate * 0.75)
+                return
+            if latency is not None:
+                self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+                self._best_latency = (self._latency if self._best_latency is None
+                                      else min(self._best_latency, self._latency))
+                if self._latency > self.latency_factor * self._best_latency:
+                    self.rate = max(self.min_rate, self.rate * 0.9)
+                    return
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+def _retry_after(resp):
+    value = resp.headers.get("Retry-After")
+    try:
+        return float(value) if value else None
+    except ValueError:  # HTTP-date form: fall back to plain backoff
+        return None
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter that takes a limiter token per request and reports the outcome."""
+
+    def __init__(self, limiter=None, **kwargs):
+        super().__init__(**kwargs)
+        self.limiter = limiter
+
+    def send(self, request, **kwargs):
+        if self.limiter is None:
+            return super().send(request, **kwargs)
+        self.limiter.acquire()
+        try:
+            resp = super().send(request, **kwargs)
+        except Exception:
+            self.limiter.feedback(None)
+            raise
+        retries = getattr(resp.raw, "retries", None)
+        retried = [h.status for h in getattr(retries, "history", ()) if h.status]
+        self.limiter.feedback(resp.status_code, resp.elapsed.total_seconds(),
+                              retry_after=_retry_after(resp), retried=retried)
+        return resp
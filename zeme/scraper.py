@@ -0,0 +1,833 @@
+# zeme/scraper.py
+# Two-phase ss.lv plots & lands scraper shared by every filter profile.
+# Phase 1: Discover regions, subregions, pages (only regions some profile wants)
+# Phase 2: Scrape listing pages -> ad links -> ad details (each ad fetched once)
+# Then every profile filters / post-processes its own frame (see run_profiles).
+# Columns: Ciems (tdo_368), Pilseta/Pagasts (tdo_856), normalized area (Platiba m2, Platiba ha)
+
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+import requests
+from urllib3.util.retry import Retry
+
+from .cache import CachingAdapter
+from .extract import AD_COLUMNS, extract_ad_fields, listing_row_record
+from .fetch import fetch_parse_all
+from .landtypes import LandTypeIndex
+from .metrics import RunMetrics
+from .ratelimit import AdaptiveRateLimiter, RateLimitedAdapter
+from .seen import SeenIndex
+from .snapshot import known_fields, load_snapshot, merge_incremental, new_links
+
+BASE  = "https://www.ss.lv"
+ROOT  = f"{BASE}/lv/real-estate/plots-and-lands/"
+
+# Tunables
+TARGET_RPS     = 10.0   # starting request rate (all requests, all workers)
+MIN_RPS        = 0.5    # adaptive limiter bounds: backs off on 429/Retry-After/slow responses,
+MAX_RPS        = 20.0   # speeds up while responses stay fast and healthy
+AD_CONCURRENCY = 8      # parallel ad-page fetches (phase 2)
+AD_PER_HOST    = 4      # parallel ad-page fetches per host
+VERBOSE        = True   # print progress
+DISCOVERY_WORKERS = 4   # parallel region/subregion discovery (phase 1)
+HTTP_CACHE_DIR = ".http_cache"  # on-disk response cache shared by all profiles (None disables)
+FAST_PARSE     = True   # lxml/XPath ad extractor (False -> BeautifulSoup only)
+PARSE_WORKERS  = os.cpu_count() or 1  # processes parsing downloaded pages (0 -> parse in fetch threads)
+PARSE_QUEUE    = 64     # downloaded pages waiting for a parser; downloads pause while full
+PARSE_POOL_MIN = 100    # fewer pages than this are parsed in the fetch threads (pool startup not worth it)
+SCRAPE_MODE    = "full" # "full" | "listing" (rows only) | "hybrid" (rows + ad pages when needed)
+HYBRID_FIELDS  = ("Zemes Tips",)  # hybrid: fetch the ad page unless the snapshot knows these
+PROMETHEUS_FILE = None  # e.g. "/var/lib/node_exporter/zeme.prom" -> run metrics in Prometheus text format
+LAND_TYPE_INDEX = ".land_types.json"  # ad link -> Zemes Tips seen before; lets type filters skip fetches (None disables)
+STREAM_BATCH   = 500    # stream_profiles: ads normalized + written to the sink per batch
+SEEN_INDEX     = ".seen_ads.npy"  # ad IDs whose page any earlier run fetched; new_only profiles skip them (None: in memory only)
+
+# -------------------------------
+# Robust session (lazy init)
+# -------------------------------
+_SESSION = None
+RATE_LIMITER = AdaptiveRateLimiter(rate=TARGET_RPS, min_rate=MIN_RPS, max_rate=MAX_RPS)
+METRICS = RunMetrics()  # reset by run_profiles; fed by the session's response hook
+
+def _make_retry():
+    try:  # urllib3 v2
+        return Retry(total=3, backoff_factor=0.5,
+                     status_forcelist=(429, 500, 502, 503, 504),
+                     allowed_methods=frozenset(["GET"]))
+    except TypeError:  # urllib3 v1
+        return Retry(total=3, backoff_factor=0.5,
+                     status_forcelist=(429, 500, 502, 503, 504),
+                     method_whitelist=frozenset(["GET"]))
+
+def sess():
+    global _SESSION
+    if _SESSION is None:
+        s = requests.Session()
+        s.headers.update({
+            "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                           "AppleWebKit/537.36 (KHTML, like Gecko) "
+                           "Chrome/123.0 Safari/537.36"),
+            "Accept-Language": "lv-LV,lv;q=0.9,en;q=0.8",
+        })
+        adapter_kw = dict(max_retries=_make_retry(), pool_maxsize=max(10, AD_CONCURRENCY),
+                          limiter=RATE_LIMITER)
+        if HTTP_CACHE_DIR:
+            s.mount("https://", CachingAdapter(HTTP_CACHE_DIR, **adapter_kw))
+        else:
+            s.mount("https://", RateLimitedAdapter(**adapter_kw))
+        s.hooks["response"].append(METRICS.observe_response)
+        _SESSION = s
+    return _SESSION
+
+# -------------------------------
+# Parse pool (lazy init)
+# -------------------------------
+_PARSE_POOL = None
+_PARSE_POOL_BROKEN = False  # a worker died (e.g. the main script fails on import): threads from then on
+
+def _init_parse_worker(fast_parse, verbose):
+    global FAST_PARSE, VERBOSE
+    FAST_PARSE, VERBOSE = fast_parse, verbose
+
+def parse_pool(n_pages):
+    """Process pool for parsing n_pages downloaded pages, or None to parse in the fetch threads."""
+    global _PARSE_POOL
+    if not PARSE_WORKERS or n_pages < PARSE_POOL_MIN or _PARSE_POOL_BROKEN:
+        return None
+    if _PARSE_POOL is None:
+        # spawn: the fetch threads are running, and forking a threaded process is unsafe
+        _PARSE_POOL = ProcessPoolExecutor(max_workers=PARSE_WORKERS,
+                                          mp_context=multiprocessing.get_context("spawn"),
+                                          initializer=_init_parse_worker,
+                                          initargs=(FAST_PARSE, VERBOSE))
+    return _PARSE_POOL
+
+def _drop_parse_pool(error):
+    """on_broken hook: forget the dead pool; this and later runs parse in the fetch threads."""
+    global _PARSE_POOL, _PARSE_POOL_BROKEN
+    pool, _PARSE_POOL, _PARSE_POOL_BROKEN = _PARSE_POOL, None, True
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+    print(f"[WARN] parse pool broken ({error!r}); parsing in the fetch threads instead")
+
+def _fetch_parse(urls, download, parse, **kwargs):
+    """fetch_parse_all with the scraper's concurrency and parse pool."""
+    return fetch_parse_all(urls, download, parse, parse_pool=parse_pool(len(urls)),
+                           parsers=PARSE_WORKERS, queue_size=PARSE_QUEUE,
+                           concurrency=AD_CONCURRENCY, per_host=AD_PER_HOST, host_delay=0,
+                           on_timing=METRICS.add_work, on_broken=_drop_parse_pool, **kwargs)
+
+#%%
+# -------------------------------
+# Helpers
+# -------------------------------
+def norm_cat(url: str) -> str:
+    """Normalize category URL (absolute + trailing slash; strip /sell/ & pages)."""
+    if url.startswith("/"):
+        url = BASE + url
+    url = url.rstrip("/")
+    url = re.sub(r"/sell(?:/.*)?$", "", url)  # remove any /sell/... tail
+    return url + "/"
+
+def region_slug(url: str):
+    """Region slug of a category, listing or ad URL (.../plots-and-lands/<slug>/...), else None."""
+    m = re.search(r"/plots-and-lands/([^/]+)/", url)
+    return m.group(1) if m else None
+
+def get_soup(url: str):
+    r = sess().get(url, timeout=30, allow_redirects=True)
+    r.raise_for_status()
+    return BeautifulSoup(r.text, "lxml"), r.url
+
+def listing_rows_from_html(html: str):
+    soup = BeautifulSoup(html, "lxml")
+    return [tr for tr in soup.find_all("tr") if tr.get("id", "").startswith("tr_")]
+
+def listing_page(url: str):
+    """GET a /sell/ page -> (rows, final_url, last page number linked from its pager)."""
+    r = sess().get(url, timeout=25, allow_redirects=True)
+    if r.status_code != 200:
+        return [], r.url, 0
+    soup = BeautifulSoup(r.text, "lxml")
+    rows = [tr for tr in soup.find_all("tr") if tr.get("id", "").startswith("tr_")]
+    links = (re.search(r"/sell/page(\d+)\.html$", a["href"]) for a in soup.find_all("a", href=True))
+    pager = [int(m.group(1)) for m in links if m]
+    return rows, r.url, max(pager, default=1)
+
+def listing_rows(url: str):
+    rows, final_url, _ = listing_page(url)
+    return rows, final_url
+
+def row_to_link(row):
+    tds = row.find_all("td")
+    if len(tds) < 3:
+        return None
+    a = tds[1].find("a", href=True)
+    if not a:
+        return None
+    return BASE + a["href"]
+
+#%%
+# ============================================================
+# PHASE 1: DISCOVERY
+# ============================================================
+def discover_region_names(root=ROOT):
+    """Return {region_url: region name} for the regions directly under ROOT, sorted by URL."""
+    soup, _ = get_soup(norm_cat(root))
+    names = {}
+    for a in soup.find_all("a", class_="a_category", href=True):
+        href = a["href"]
+        if not href.startswith("/lv/real-estate/plots-and-lands/"):
+            continue
+        url = norm_cat(href)
+        if url != norm_cat(root) and url not in names:
+            base_parts = norm_cat(root).strip("/").split("/")
+            url_parts  = url.strip("/").split("/")
+            if len(url_parts) == len(base_parts) + 1:
+                names[url] = a.get_text(" ", strip=True)
+    if VERBOSE:
+        print(f"[DISCOVERY] Regions found: {len(names)}")
+    return dict(sorted(names.items()))
+
+def discover_regions(root=ROOT):
+    """Return a sorted list of region URLs directly under ROOT."""
+    return list(discover_region_names(root))
+
+def discover_subregions(region_url: str):
+    """Return a sorted list of subregion URLs directly under a region (one level)."""
+    soup, _ = get_soup(norm_cat(region_url))
+    subs = []
+    seen = set()
+    for a in soup.find_all("a", class_="a_category", href=True):
+        href = a["href"]
+        if not href.startswith("/lv/real-estate/plots-and-lands/"):
+            continue
+        url = norm_cat(href)
+        base_parts = norm_cat(region_url).strip("/").split("/")
+        url_parts  = url.strip("/").split("/")
+        if len(url_parts) == len(base_parts) + 1:
+            if url not in seen:
+                subs.append(url)
+                seen.add(url)
+    return sorted(subs)
+
+def discover_pagination_for_sell(sell_url: str, max_pages=300):
+    """
+    Return the actual listing pages for a given /sell/ with the listing rows on each:
+      [(/sell/, [row_record, ...]), (/sell/page2.html, rows or None), ...]
+    row_record: listing_row_record() dict (Link, price, area, ... from the row);
+    None: page not downloaded during discovery (phase 2 fetches it).
+    The page count comes from the pager on page 1, confirmed by probing the next page.
+    If the pager is truncated, the end is found by exponential + binary probing, where
+    a page exists unless it redirects away or has no listing rows. O(log N) requests.
+    """
+    def page_url(n):
+        return sell_url if n == 1 else f"{sell_url}page{n}.html"
+
+    rows, _, pager_last = listing_page(sell_url)
+    if not rows:
+        return []
+    harvested = {1: [rec for rec in (listing_row_record(row, BASE) for row in rows) if rec]}
+
+    def exists(n):
+        if n in harvested:
+            return True
+        url = page_url(n)
+        rows, final_url, _ = listing_page(url)
+        if not rows or final_url.rstrip("/") != url.rstrip("/"):
+            return False
+        harvested[n] = [rec for rec in (listing_row_record(row, BASE) for row in rows) if rec]
+        return True
+
+    last = min(pager_last, max_pages)          # pages linked from the pager exist
+    if last < max_pages and exists(last + 1):  # pager truncated -> probe for the end
+        last, step, beyond = last + 1, 1, None
+        while beyond is None and last < max_pages:
+            step *= 2
+            n = min(last + step, max_pages)
+            if exists(n):
+                last = n
+            else:
+                beyond = n
+        while beyond is not None and beyond - last > 1:
+            mid = (last + beyond) // 2
+            if exists(mid):
+                last = mid
+            else:
+                beyond = mid
+    return [(page_url(n), harvested.get(n)) for n in range(1, last + 1)]
+
+def phase1_discover_inventory(root=ROOT, include_region_if_no_subs=True, workers=None, regions=None):
+    """
+    Returns:
+      regions:                [region_url, ...]
+      subregions_by_region:   {region_url: [subregion_url, ...], ...}
+      listing_pages:          [(owner_url, page_url, rows), ...] owner_url is region or subregion;
+                              rows (listing_row_record dicts) are harvested while paginating
+                              and reused by phase 2
+    regions: region URLs to walk (default: every region under root).
+    Regions and /sell/ targets are discovered by a pool of `workers` threads
+    (default DISCOVERY_WORKERS); output order is the same as a serial walk.
+    """
+    regions = discover_regions(root) if regions is None else list(regions)
+    listing_pages = []
+
+    with ThreadPoolExecutor(max_workers=workers or DISCOVERY_WORKERS) as pool:
+        subregions_by_region = dict(zip(regions, pool.map(discover_subregions, regions)))
+
+        targets = []
+        for reg in regions:
+            subs = subregions_by_region[reg]
+            targets += subs if subs else ([reg] if include_region_if_no_subs else [])
+
+        sell_urls = [norm_cat(target) + "sell/" for target in targets]
+        for target, pages in zip(targets, pool.map(discover_pagination_for_sell, sell_urls)):
+            for p, records in pages:
+                listing_pages.append((target, p, records))
+            if VERBOSE:
+                name = target.replace(ROOT, "")
+                print(f"[DISCOVERY] {name}: pages={len(pages)}")
+
+    if VERBOSE:
+        total_pages = len(listing_pages)
+        total_subs  = sum(len(v) for v in subregions_by_region.values())
+        print(f"[SUMMARY] Regions={len(regions)}, Subregions={total_subs}, Listing pages={total_pages}")
+
+    return regions, subregions_by_region, listing_pages
+
+#%%
+# ============================================================
+# PHASE 2: SCRAPING
+# ============================================================
+def download_page(url):
+    """GET a page -> (body bytes, encoding); decoding is left to the parser."""
+    r = sess().get(url, timeout=30)
+    if r.status_code != 200:
+        raise requests.HTTPError(f"{r.status_code} on {url}", response=r)
+    return r.content, r.encoding
+
+def _decode(page):
+    content, encoding = page
+    return content.decode(encoding or "utf-8", errors="replace")
+
+def parse_listing_page(page_url, page):
+    """download_page() result -> the page's listing-row records."""
+    parts = urlsplit(page_url)
+    base = f"{parts.scheme}://{parts.netloc}"
+    return [listing_row_record(row, base) for row in listing_rows_from_html(_decode(page))]
+
+def fetch_listing_records(page_url):
+    """GET one listing page -> its listing-row records."""
+    return parse_listing_page(page_url, download_page(page_url))
+
+def collect_listing_records(listing_pages):
+    """
+    listing_pages: list of (owner_url, page_url, rows) from phase 1; pages without
+                   rows (None, or plain (owner_url, page_url) entries) are fetched
+                   concurrently here.
+    Returns: list of listing-row records, unique by Link, in page order
+    """
+    missing = [page_url for _, page_url, *harvested in listing_pages
+               if not harvested or harvested[0] is None]
+    fetched = dict(_fetch_parse(missing, download_page, parse_listing_page))
+    METRICS.count("listing_pages_fetched", len(missing))
+
+    seen = set()
+    all_records = []
+    for idx, (_, page_url, *harvested) in enumerate(listing_pages, start=1):
+        records = harvested[0] if harvested and harvested[0] is not None else fetched[page_url]
+        if isinstance(records, Exception):
+            METRICS.count("listing_pages_failed")
+            if VERBOSE:
+                print(f"[WARN] {records}")
+            continue
+        added = 0
+        for rec in records:
+            if rec and rec["Link"] not in seen:
+                seen.add(rec["Link"])
+                all_records.append(rec)
+                added += 1
+        if VERBOSE:
+            print(f"[LISTING {idx}/{len(listing_pages)}] +{added} links (unique total {len(all_records)})")
+    return all_records
+
+def collect_ad_links_from_pages(listing_pages):
+    """Returns: list of unique ad links (see collect_listing_records)"""
+    return [rec["Link"] for rec in collect_listing_records(listing_pages)]
+
+def extract_text_by_id(soup, el_id, default="NA"):
+    el = soup.find(id=el_id)
+    return el.get_text(strip=True) if el else default
+
+def extract_datums(soup):
+    nodes = soup.find_all(string=re.compile(r"\bDatums:"))
+    if not nodes:
+        return "NA"
+    node = nodes[0]
+    parent_text = node.parent.get_text(" ", strip=True) if getattr(node, "parent", None) else str(node)
+    m = re.search(r"(\d{2}\.\d{2}\.\d{4}\.|\d{4}-\d{2}-\d{2})", parent_text)
+    return m.group(1) if m else parent_text
+
+def parse_ad_html(url, html):
+    """Ad page HTML -> detail dict (fast lxml extractor, BeautifulSoup fallback)."""
+    if FAST_PARSE:
+        try:
+            return {"Link": url, **extract_ad_fields(html)}
+        except Exception as e:
+            if VERBOSE:
+                print(f"[WARN] fast parse failed on {url} -> {e}; using BeautifulSoup")
+    soup = BeautifulSoup(html, "lxml")
+    return {
+        "Link":               url,
+        "Pilseta":            extract_text_by_id(soup, "tdo_20"),   # City
+        "Pilseta/Pagasts":    extract_text_by_id(soup, "tdo_856"),  # City/Parish (e.g., "Ķekavas pag.")
+        "Iela":               extract_text_by_id(soup, "tdo_11"),   # Street
+        "Ciems":              extract_text_by_id(soup, "tdo_368"),  # Village
+        "Platiba":            extract_text_by_id(soup, "tdo_3"),    # Area (raw text)
+        "Cena":               extract_text_by_id(soup, "tdo_8"),    # Price (raw text)
+        "Zemes Tips":         extract_text_by_id(soup, "tdo_228"),  # Land usage/type
+        "Zemes Numurs":       extract_text_by_id(soup, "tdo_1631"), # Cadastral/land number
+        "Datums":             extract_datums(soup),                 # Date
+    }
+
+def parse_ad_page(url, page):
+    """download_page() result -> detail dict (runs in the parse pool)."""
+    return parse_ad_html(url, _decode(page))
+
+def parse_ad_details(url):
+    return parse_ad_page(url, download_page(url))
+
+_PRICE_RE    = re.compile(r"(\d[\d\s,.]*?)\s*€")
+_PRICE_M2_RE = re.compile(r"\(([\d\.,\s]+)\s*€/m²\)")
+_AREA_RE     = re.compile(r"(\d[\d\s,.]*)(.*)")
+_SPACES_RE   = re.compile(r"\s+")
+_GROUPS_RE   = re.compile(r"(?<=\d)[,.](?=\d{3}(?!\d))")  # "25,000" / "1.200": thousands separators
+
+def _amount(text, groups=True):
+    """"25 000" / "25,000" / "25\xa0000" -> "25000"; groups=False: "," is the decimal point."""
+    text = _SPACES_RE.sub("", text)
+    if groups:
+        text = _GROUPS_RE.sub("", text)
+    return text.replace(",", ".")
+
+def _parse_price(text):
+    """"25 000 € (20.83 €/m²)" / "25,000  €" -> ("25000", "20.83"); None where absent."""
+    m = _PRICE_RE.search(text)
+    eur = _amount(m.group(1)) if m else None
+    m = _PRICE_M2_RE.search(text)
+    per_m2 = _amount(m.group(1), groups=False) if m else None
+    return eur, per_m2
+
+def _parse_area(text):
+    """"1,5 ha." -> ("1.5", "ha.", True), "1,200 m²" -> ("1200", "m²", False); amount None where absent."""
+    m = _AREA_RE.search(text)
+    if not m:
+        return None, "", False
+    unit = m.group(2)
+    key = _SPACES_RE.sub("", unit.strip().lower().replace(".", "")).replace("m²", "m2")
+    # hectares come with a decimal comma ("1,5 ha."), m² with thousands groups ("1,200")
+    return _amount(m.group(1), groups=key != "ha"), unit, key == "ha"
+
+def _is_number(text):
+    try:
+        float(text)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+def _clean_listing_row(rec):
+    """
+    Listing row record without its Cena / Platiba cell when that does not parse to a
+    number (in m² or ha): a wrong price / area is worse than the snapshot's or none.
+    -> (record, True if nothing was dropped)
+    """
+    bad = []
+    if "Cena" in rec and not _is_number(_parse_price(rec["Cena"])[0]):
+        bad.append("Cena")
+    if "Platiba" in rec:
+        amount, unit, is_ha = _parse_area(rec["Platiba"])
+        if not _is_number(amount) or not (is_ha or unit.lower().replace("²", "2").startswith("m2")):
+            bad.append("Platiba")
+    if not bad:
+        return rec, True
+    return {k: v for k, v in rec.items() if k not in bad}, False
+
+def _parse_distinct(col, parse):
+    """
+    Apply parse() once per distinct value of a text column.
+    -> (codes, parsed): parsed[i] is parse() of distinct value i, codes maps rows to it.
+    Missing values are parsed as "NA" (an extra last entry).
+    """
+    codes, uniques = pd.factorize(col)
+    parsed = [parse(str(v)) for v in uniques]
+    missing = codes < 0
+    if missing.any():
+        codes = codes.copy()
+        codes[missing] = len(parsed)
+        parsed.append(parse("NA"))
+    return codes, parsed
+
+def _numeric_at(values, codes, index):
+    """Cleaned number strings (one per distinct value) -> numeric column by row codes."""
+    return pd.to_numeric(pd.Series(values), errors="coerce").take(codes).set_axis(index)
+
+def normalize_numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cena / Platiba text -> Cena EUR, Cena m2, Platiba Daudzums, Platiba Mervieniba,
+    Platiba m2, Platiba ha (raw Cena / Platiba dropped).
+    Each distinct text is parsed once (one pass over all its fields); rows pick up
+    the result by factorize code, so repeated values across ads/snapshots cost nothing.
+    """
+    price_codes, prices = _parse_distinct(df["Cena"], _parse_price)
+    area_codes, areas = _parse_distinct(df["Platiba"], _parse_area)
+
+    out = df.drop(columns=["Platiba", "Cena"], errors="ignore")
+    out["Cena EUR"] = _numeric_at([p[0] for p in prices], price_codes, df.index)
+    out["Cena m2"] = _numeric_at([p[1] for p in prices], price_codes, df.index)
+    amt = _numeric_at([a[0] for a in areas], area_codes, df.index)
+    out["Platiba Daudzums"] = amt
+    out["Platiba Mervieniba"] = pd.Series([a[1] for a in areas], dtype=str).take(area_codes).set_axis(df.index)
+
+    # --- Normalized area columns in m2 and ha ---
+    is_ha = pd.Series([a[2] for a in areas], dtype=bool).take(area_codes).set_axis(df.index)
+    out["Platiba m2"] = amt.where(~is_ha, amt * 10000)
+    out["Platiba ha"] = amt.where(is_ha, amt / 10000)
+    return out
+
+def tidy_text_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Strip the "[Karte]" link text from Iela and the "Datums:" label from Datums."""
+    if "Iela" in df.columns:
+        df["Iela"] = df["Iela"].str.replace("[Karte]", "", case=False, regex=False)
+    if "Datums" in df.columns:
+        df["Datums"] = df["Datums"].str.replace("Datums:", "", case=False, regex=False).str.strip()
+    return df
+
+def filter_by_zemes_tips(df: pd.DataFrame, allowed) -> pd.DataFrame:
+    """Keep rows whose Zemes Tips is one of `allowed` (case-insensitive)."""
+    allowed_lower = {t.lower() for t in allowed}
+    return df[df["Zemes Tips"].fillna("").str.lower().isin(allowed_lower)]
+
+def fetch_ad_details(ad_links, run=None, on_detail=None):
+    """
+    Fetch + parse the given ad links -> list of detail dicts in link order (failures skipped).
+    run: RunCheckpoint -> details stored by an earlier attempt are reused and
+         new ones are checkpointed as they arrive.
+    on_detail(detail): streaming -> every detail (restored ones first, then in completion
+         order) goes to on_detail instead of the returned list, which stays empty.
+    """
+    wanted = set(ad_links)
+    details = [d for d in run.details() if d["Link"] in wanted] if run else []
+    restored = {d["Link"] for d in details}
+    todo = [link for link in ad_links if link not in restored]
+    if VERBOSE and restored:
+        print(f"[RESUME] {len(restored)} ads restored from checkpoint, {len(todo)} to fetch")
+    if on_detail:
+        for d in details:
+            on_detail(d)
+        details = []
+
+    # Download ad pages concurrently (pacing by RATE_LIMITER), parse them in the parse
+    # pool; results come back in link order
+    def progress(done, total):
+        if VERBOSE and done % 50 == 0:
+            print(f"[SCRAPE] Parsed {done}/{total} ads")
+
+    def on_result(link, res):
+        if run:
+            run.record(link, res)
+        if isinstance(res, Exception):
+            METRICS.count("ads_failed")
+            print(f"[WARN] failed: {link} -> {res}")
+            return
+        METRICS.count("ads_fetched")
+        if on_detail:
+            on_detail(res)
+
+    results = _fetch_parse(todo, download_page, parse_ad_page, on_done=progress,
+                           on_result=on_result, keep=on_detail is None)
+    if run:
+        run.flush()
+    details += [res for _, res in results if not isinstance(res, Exception)]
+    METRICS.count("ads_restored", len(restored))
+    if restored and not on_detail:
+        order = {link: i for i, link in enumerate(ad_links)}
+        details.sort(key=lambda d: order[d["Link"]])
+    return details
+
+def details_to_frame(details, profile=None):
+    """Detail dicts -> normalized DataFrame (may be empty), filtered/tidied per `profile`."""
+    with METRICS.stage("normalize"):
+        df = pd.DataFrame(details)
+        if df.empty:
+            return df
+
+        # Filter by desired Zemes Tips BEFORE heavy numeric processing
+        if profile is not None and profile.zemes_tips is not None:
+            df = filter_by_zemes_tips(df, profile.zemes_tips)
+
+        df["Datu iev."] = datetime.today().strftime("%Y-%m-%d")
+        df = normalize_numeric_columns(df)
+        if profile is not None and profile.tidy:
+            df = tidy_text_columns(df)
+        df = df.drop_duplicates(subset=["Link"]).reset_index(drop=True)
+
+        if profile is not None and profile.require_price_area:
+            df = df[df["Cena EUR"].notna() & df["Platiba Daudzums"].notna()]
+        return df
+
+def scrape_ad_links(ad_links, run=None, profile=None):
+    """Fetch + parse the given ad links into a normalized DataFrame (may be empty)."""
+    return details_to_frame(fetch_ad_details(ad_links, run), profile)
+
+def collect_listing_records_checkpointed(listing_pages, run=None):
+    """collect_listing_records, reusing/saving the run's listing_records checkpoint."""
+    records = run.load_listing_records() if run else None
+    if records is None:
+        records = collect_listing_records(listing_pages)
+        if run:
+            run.save_listing_records(records)
+    elif VERBOSE:
+        print(f"[RESUME] {len(records)} listing records restored from checkpoint")
+    return records
+
+#%%
+# ============================================================
+# PROFILES: one scrape, one output per filter profile
+# ============================================================
+def _check_mode(profile, mode):
+    if mode not in ("full", "listing", "hybrid"):
+        raise ValueError(f"Unknown scrape mode {mode!r} (use 'full', 'listing' or 'hybrid')")
+    # Listing-only rows carry no Zemes Tips, so the land-type filter could not be applied
+    if mode == "listing" and profile.zemes_tips is not None:
+        raise ValueError(f"Profile {profile.name!r} filters on Zemes Tips; "
+                         "use mode 'full' or 'hybrid'")
+    # The seen index records fetched ad pages, which listing mode never requests
+    if mode == "listing" and profile.new_only:
+        raise ValueError(f"Profile {profile.name!r} is new_only; use mode 'full' or 'hybrid'")
+
+def _known_type(rec, land_types):
+    tips = rec.get("Zemes Tips")
+    return tips if tips and tips != "NA" else land_types.get(rec["Link"])
+
+def _plan_profile(profile, records, names, prev, mode, land_types, seen, current=frozenset()):
+    """-> (profile's records in page order, known snapshot fields, ad links to fetch)"""
+    mine = [rec for rec in records
+            if profile.wants_region(region_slug(rec["Link"]), names.get(region_slug(rec["Link"])))]
+    # Land-type filter before any ad request: the listing row's type column or the
+    # type an earlier run saw on the ad page. Ads of unknown type are still fetched.
+    in_regions = len(mine)
+    mine = [rec for rec in mine if profile.wants_type(_known_type(rec, land_types))]
+    if VERBOSE and len(mine) < in_regions:
+        print(f"[PROFILE] {profile.name}: {in_regions - len(mine)} ads skipped by Zemes Tips")
+    links = [rec["Link"] for rec in mine]
+    if profile.new_only:
+        # Ads any earlier run fetched (for any profile) are neither fetched nor output;
+        # they stay in `mine`, so an incremental merge still sees them as listed.
+        # Ads this run already fetched (`current`, on resume) are still its own.
+        old = seen.contains(links)
+        if current:
+            old &= ~pd.Index(links).isin(list(current))
+        METRICS.count("ads_skipped_seen", int(old.sum()))
+        if VERBOSE and old.any():
+            print(f"[PROFILE] {profile.name}: {int(old.sum())} ads skipped as already seen")
+        links = [link for link, skip in zip(links, old) if not skip]
+    if mode == "listing":
+        # the snapshot keeps the ad-page-only fields (Zemes Tips, Zemes Numurs, ...)
+        return mine, known_fields(prev, (), AD_COLUMNS), []
+    if mode == "hybrid":
+        known = known_fields(prev, HYBRID_FIELDS, AD_COLUMNS)
+        # a price / area cell that does not parse cleanly is taken from the ad page
+        unclean = {rec["Link"] for rec in mine if not _clean_listing_row(rec)[1]}
+        return mine, known, [link for link in links if link not in known or link in unclean]
+    # full: only ads missing from the last snapshot are fetched
+    return mine, {}, (new_links(links, prev) if prev is not None else links)
+
+def _profile_frame(profile, mine, known, todo, fetched, prev, mode):
+    """Assemble one profile's output from its records and the shared ad details."""
+    todo = set(todo)
+    if mode == "full":
+        df = details_to_frame([fetched[rec["Link"]] for rec in mine
+                               if rec["Link"] in todo and rec["Link"] in fetched], profile)
+    else:
+        # Listing rows give price, area, street, village and description; ad-page-only
+        # columns (Zemes Tips, Zemes Numurs, ...) come from the ad page or the snapshot
+        blank = dict.fromkeys(AD_COLUMNS, "NA")
+        details = []
+        for rec in mine:
+            link = rec["Link"]
+            if link in todo and link in fetched:  # ad page wins, the row adds its description
+                details.append({**fetched[link], "Apraksts": rec["Apraksts"]})
+            elif link in known or mode == "listing":
+                details.append({**blank, **known.get(link, {}), **_clean_listing_row(rec)[0]})
+        df = details_to_frame(details, profile)
+    if prev is not None:
+        df = merge_incremental(prev, df, [rec["Link"] for rec in mine],
+                               datetime.today().strftime("%Y-%m-%d"))
+    return df
+
+def run_profiles(profiles, root=ROOT, snapshots=None, run=None, mode=None):
+    """
+    Scrape once for several filter profiles -> {profile.name: DataFrame}.
+    Discovery walks only the regions some profile wants, every ad page is fetched at
+    most once (one session, one HTTP cache), then each profile filters its own frame.
+    snapshots: {profile name: previous output CSV / Parquet store} (default profile.snapshot)
+               -> incremental run: only new ads are fetched, unlisted rows marked Delisted
+    run:       RunCheckpoint -> stages are checkpointed; finished stages are reused on resume,
+               and the run report (METRICS) is written to <run dir>/metrics.json. The
+               fetched ads enter the seen index at run.finish(), once the outputs are written
+    mode:      "full" (every ad page), "listing" (listing rows only) or "hybrid"
+               (listing rows + ad pages for ads unknown to the snapshot); default SCRAPE_MODE
+    """
+    profiles = list(profiles)
+    mode = mode or SCRAPE_MODE
+    for profile in profiles:
+        _check_mode(profile, mode)
+    METRICS.reset()
+    frames = _run_profiles(profiles, root, snapshots or {}, run, mode)
+    _report_run({name: len(df) for name, df in frames.items()}, run)
+    return frames
+
+def stream_profiles(profiles, sinks, root=ROOT, run=None, batch_size=None):
+    """
+    run_profiles (mode "full") without holding the output: each profile's ads are
+    normalized in batches of batch_size (default STREAM_BATCH) and written to
+    sinks[profile.name] (see zeme.sink) as they are parsed, so memory stays flat
+    however many ads there are. Rows are written in completion order.
+    -> {profile.name: rows written}. The sinks are not closed.
+    """
+    profiles = list(profiles)
+    for profile in profiles:
+        _check_mode(profile, "full")
+        if profile.snapshot is not None:
+            raise ValueError(f"Profile {profile.name!r} has a snapshot; incremental runs "
+                             "merge the whole output, use run_profiles")
+    METRICS.reset()
+    _stream_profiles(profiles, sinks, root, run, batch_size or STREAM_BATCH)
+    written = {profile.name: sinks[profile.name].rows for profile in profiles}
+    _report_run(written, run)
+    return written
+
+def _report_run(outputs, run):
+    METRICS.gauge("limiter_rps", round(RATE_LIMITER.rate, 3))
+    for name, rows in outputs.items():
+        METRICS.output(name, rows)
+    if run:
+        METRICS.write_json(os.path.join(run.run_dir, "metrics.json"))
+    if PROMETHEUS_FILE:
+        METRICS.write_prometheus(PROMETHEUS_FILE)
+    if VERBOSE:
+        print(f"[METRICS] {METRICS.summary()}")
+
+def _check_regions(profiles, region_names):
+    """Warn about profile regions matching no discovered region (slug or name); raise if none match."""
+    known = {region_slug(url) for url in region_names} | set(region_names.values())
+    for profile in profiles:
+        if profile.regions is None:
+            continue
+        unknown = sorted(profile.regions - known)
+        if len(unknown) == len(profile.regions):
+            raise ValueError(f"Profile {profile.name!r}: none of its regions {unknown} is on the site; "
+                             f"regions are {sorted(region_names.values())}")
+        if unknown:
+            print(f"[WARN] Profile {profile.name!r}: regions {unknown} not found on the site; skipped")
+
+def _plan_run(profiles, root, snapshots, run, mode):
+    """
+    Phase 1 + listing pages
+    -> (land type index, seen index, [(prev, mine, known, links)], ads to fetch)
+    """
+    # PHASE 1: discover (union of the profiles' regions)
+    listing_pages = run.load_listing_pages() if run else None
+    region_names = (run.load_region_names() if run else None) or {}
+    if listing_pages is None:
+        with METRICS.stage("discovery"):
+            region_names = discover_region_names(root)
+            _check_regions(profiles, region_names)
+            wanted = [url for url, name in region_names.items()
+                      if any(p.wants_region(region_slug(url), name) for p in profiles)]
+            regions, subregions_by_region, listing_pages = phase1_discover_inventory(root, regions=wanted)
+        if run:
+            run.save_region_names(region_names)
+            run.save_listing_pages(listing_pages)
+    elif VERBOSE:
+        print(f"[RESUME] {len(listing_pages)} listing pages restored from checkpoint")
+    names = {region_slug(url): name for url, name in region_names.items()}
+
+    # PHASE 2: collect links once, fetch the union of the profiles' ads once
+    with METRICS.stage("listing_fetch"):
+        records = collect_listing_records_checkpointed(listing_pages, run)
+    land_types = LandTypeIndex(LAND_TYPE_INDEX)
+    land_types.update(records)
+    seen = SeenIndex(SEEN_INDEX)
+    current = ({d["Link"] for d in run.details()} if run and any(p.new_only for p in profiles)
+               else frozenset())
+    plans = []
+    for profile in profiles:
+        prev = load_snapshot(snapshots.get(profile.name, profile.snapshot))
+        plans.append((prev, *_plan_profile(profile, records, names, prev, mode, land_types, seen, current)))
+    todo = list(dict.fromkeys(link for _, _, _, links in plans for link in links))
+    if VERBOSE:
+        print(f"[SCRAPE] Unique ad links: {len(records)}, ad pages to fetch: {len(todo)}")
+        for profile, (prev, mine, _, links) in zip(profiles, plans):
+            print(f"[PROFILE] {profile.name}: links={len(mine)}, to fetch={len(links)}"
+                  + (" (incremental)" if prev is not None else ""))
+    return land_types, seen, plans, todo
+
+def _save_seen(seen, run):
+    """
+    Persist the fetched ads as seen only once the outputs are written: at run.finish()
+    (else a crash before the outputs would make new_only profiles skip them for good).
+    Without a run there is nothing to resume, so they are saved right away.
+    """
+    if run is not None:
+        run.at_finish(seen.save)
+    else:
+        seen.save()
+
+def _run_profiles(profiles, root, snapshots, run, mode):
+    land_types, seen, plans, todo = _plan_run(profiles, root, snapshots, run, mode)
+    with METRICS.stage("ad_fetch"):
+        fetched = {d["Link"]: d for d in fetch_ad_details(todo, run)}
+    land_types.update(fetched.values())
+    land_types.save()
+    seen.add(fetched)
+    _save_seen(seen, run)
+
+    return {profile.name: _profile_frame(profile, *plan[1:], fetched, plan[0], mode)
+            for profile, plan in zip(profiles, plans)}
+
+def _stream_profiles(profiles, sinks, root, run, batch_size):
+    land_types, seen, plans, todo = _plan_run(profiles, root, {}, run, "full")
+    # Route every parsed ad to the profiles that planned it; a full batch is
+    # normalized and written right away
+    wants = [set(links) for _, _, _, links in plans]
+    batches = [[] for _ in profiles]
+
+    def flush(i):
+        if batches[i]:
+            sinks[profiles[i].name].write(details_to_frame(batches[i], profiles[i]))
+            batches[i] = []
+
+    def route(detail):
+        land_types.update([detail])
+        seen.add([detail["Link"]])
+        for i, links in enumerate(wants):
+            if detail["Link"] in links:
+                batches[i].append(detail)
+                if len(batches[i]) >= batch_size:
+                    flush(i)
+
+    with METRICS.stage("ad_fetch"):
+        fetch_ad_details(todo, run, on_detail=route)
+        for i in range(len(profiles)):
+            flush(i)
+    land_types.save()
+    _save_seen(seen, run)
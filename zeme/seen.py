@@ -0,0 +1,64 @@
+# zeme/seen.py
+# Persistent set of ads whose page was already fetched, shared by all profiles and runs.
+# Ads are keyed by the ID at the end of their URL (".../aiviekstes-pag/dpffl.html" ->
+# "dpffl"), so the same ad matches under any host or category path: lowercase
+# alphanumeric IDs of up to 12 characters map exactly to an int64 (base 36), anything
+# else to a 63-bit hash of the ID (negative, so the two never collide).
+# The IDs are kept as one sorted int64 array (.npy, 8 bytes per ad), memory-mapped on
+# load and probed with binary search, so millions of ads cost a few MB.
+
+import hashlib
+import os
+
+import numpy as np
+
+def ad_id(link) -> int:
+    """Ad URL -> int64 key."""
+    slug = link.rstrip("/").rsplit("/", 1)[-1]
+    if slug.endswith(".html"):
+        slug = slug[:-5]
+    # no leading zero, so int(slug, 36) stays one-to-one
+    if (len(slug) <= 12 and slug.isascii() and slug.isalnum() and slug == slug.lower()
+            and not slug.startswith("0")):
+        return int(slug, 36)
+    digest = hashlib.blake2b(slug.encode("utf-8"), digest_size=8).digest()
+    return -1 - (int.from_bytes(digest, "big") >> 1)
+
+class SeenIndex:
+    def __init__(self, path=None):
+        self.path = path
+        self._ids = np.empty(0, dtype=np.int64)
+        self._new = set()
+        if path and os.path.exists(path):
+            self._ids = np.load(path, mmap_mode="r")
+
+    def __len__(self):
+        return len(self._ids) + len(self._new)
+
+    def __contains__(self, link):
+        return bool(self.contains([link])[0])
+
+    def contains(self, links):
+        """Boolean array: which of `links` were seen (saved or added since)."""
+        ids = np.fromiter((ad_id(link) for link in links), dtype=np.int64)
+        pos = np.searchsorted(self._ids, ids)
+        found = np.zeros(len(ids), dtype=bool)
+        inside = pos < len(self._ids)
+        found[inside] = self._ids[pos[inside]] == ids[inside]
+        if self._new:
+            found |= np.fromiter((i in self._new for i in ids.tolist()), dtype=bool, count=len(ids))
+        return found
+
+    def add(self, links):
+        self._new.update(ad_id(link) for link in links)
+
+    def save(self):
+        if not self.path or not self._new:
+            return
+        ids = np.union1d(self._ids, np.fromiter(self._new, dtype=np.int64, count=len(self._new)))
+        tmp = self.path + ".tmp.npy"
+        np.save(tmp, ids)
+        self._ids = None  # release the memory map before replacing the file
+        os.replace(tmp, self.path)
+        self._ids = np.load(self.path, mmap_mode="r")
+        self._new = set()
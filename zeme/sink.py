@@ -0,0 +1,115 @@
+# zeme/sink.py
+# Output sinks for streaming scrapes (scraper.stream_profiles): normalized rows are
+# appended batch by batch as ads are parsed, so nothing waits for the end of the run.
+#   CsvSink      .csv             header once, then appended rows
+#   ParquetSink  .parquet         one row group per batch (pyarrow; readable after close)
+#   SqliteSink   .sqlite / .db    one table (default "ads"), committed per batch
+# The first batch fixes the columns; later batches are aligned to them.
+
+import os
+import sqlite3
+
+import pandas as pd
+
+from .snapshot import NUMERIC_COLS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    _HAS_PYARROW = True
+except Exception:
+    _HAS_PYARROW = False
+
+class _Sink:
+    def __init__(self, path):
+        self.path = path
+        self.columns = None
+        self.rows = 0
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+
+    def write(self, df: pd.DataFrame):
+        """Append one batch of scraper output rows."""
+        if df.empty:
+            return
+        if self.columns is None:
+            self.columns = list(df.columns)
+            self._open(df)
+        self._append(df.reindex(columns=self.columns))
+        self.rows += len(df)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+class CsvSink(_Sink):
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = open(path, "w", encoding="utf-8", newline="")
+
+    def _open(self, df):
+        pd.DataFrame(columns=self.columns).to_csv(self._file, index=False)
+
+    def _append(self, df):
+        df.to_csv(self._file, index=False, header=False)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+class ParquetSink(_Sink):
+    def __init__(self, path):
+        if not _HAS_PYARROW:
+            raise ImportError("Parquet output needs pyarrow. Run: pip install pyarrow")
+        super().__init__(path)
+        self._writer = None
+
+    def _open(self, df):
+        # Fixed schema (float64 numerics, strings otherwise): batches infer their own dtypes
+        self._schema = pa.schema([(col, pa.float64() if col in NUMERIC_COLS else pa.string())
+                                  for col in self.columns])
+        self._writer = pq.ParquetWriter(self.path, self._schema)
+
+    def _append(self, df):
+        df = df.copy()
+        for col in self.columns:
+            if col in NUMERIC_COLS:
+                df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+            else:
+                df[col] = df[col].astype(object).where(df[col].notna(), None)
+        self._writer.write_table(pa.Table.from_pandas(df, schema=self._schema, preserve_index=False))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+class SqliteSink(_Sink):
+    def __init__(self, path, table="ads"):
+        super().__init__(path)
+        self.table = table
+        self._con = sqlite3.connect(path)
+
+    def _open(self, df):
+        self._con.execute(f'DROP TABLE IF EXISTS "{self.table}"')
+
+    def _append(self, df):
+        df.to_sql(self.table, self._con, if_exists="append", index=False)
+        self._con.commit()
+
+    def close(self):
+        self._con.close()
+
+SINKS = {".csv": CsvSink, ".parquet": ParquetSink, ".sqlite": SqliteSink, ".db": SqliteSink}
+
+def open_sink(path):
+    """Sink for `path`, chosen by its extension (.csv, .parquet, .sqlite / .db)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in SINKS:
+        raise ValueError(f"Unknown output format {ext!r} for {path} (use {', '.join(SINKS)})")
+    return SINKS[ext](path)
@@ -0,0 +1,143 @@
+# zeme/snapshot.py
+# Scraper output snapshots.
+# A snapshot is a scraper output frame (e.g. df_zeme.csv) keyed by "Link".
+# Incremental runs fetch only links missing from the snapshot and mark rows whose
+# link is no longer listed with the date they disappeared ("Delisted").
+# Snapshots can also be kept in a typed Parquet store partitioned by scrape date
+# ("Datu iev.") and optionally region ("Pilseta"); pyarrow is needed for that.
+
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    _HAS_PYARROW = True
+except Exception:
+    _HAS_PYARROW = False
+
+DELISTED_COL = "Delisted"
+
+def load_snapshot(path):
+    """
+    Return the previous run's frame, or None if there is no snapshot yet.
+    path: output CSV, or a Parquet store directory (its latest scrape date is used).
+    """
+    if not path or not os.path.exists(path):
+        return None
+    if os.path.isdir(path):
+        dates = snapshot_dates(path)
+        return read_snapshots(path, start=dates[-1], end=dates[-1]) if dates else None
+    # Text as written (Zemes Numurs "01000120034" must not become 1000120034.0), numbers typed
+    df = pd.read_csv(path, dtype=str)
+    for col in NUMERIC_COLS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+def new_links(ad_links, prev: pd.DataFrame):
+    """Links (in collection order) that the snapshot has not seen."""
+    known = set(prev["Link"].dropna()) if "Link" in prev.columns else set()
+    return [link for link in ad_links if link not in known]
+
+def merge_incremental(prev: pd.DataFrame, df_new: pd.DataFrame, ad_links, today: str) -> pd.DataFrame:
+    """
+    Combine freshly scraped rows with the snapshot:
+      - new rows first, then snapshot rows (new rows win on duplicate Link)
+      - snapshot rows whose Link is not in ad_links get Delisted=today (first time only)
+      - snapshot rows listed again get Delisted cleared
+    """
+    prev = prev.copy()
+    if DELISTED_COL not in prev.columns:
+        prev[DELISTED_COL] = None
+    prev[DELISTED_COL] = prev[DELISTED_COL].astype(object)
+    listed = prev["Link"].isin(set(ad_links))
+    prev.loc[~listed & prev[DELISTED_COL].isna(), DELISTED_COL] = today
+    prev.loc[listed, DELISTED_COL] = None
+
+    frames = [f for f in (df_new, prev) if not f.empty]
+    if not frames:
+        return prev
+    df = pd.concat(frames, ignore_index=True)
+    return df.drop_duplicates(subset=["Link"]).reset_index(drop=True)
+
+def known_fields(prev: pd.DataFrame, required, carry):
+    """
+    {link: {col: value, ...}} for snapshot rows where every `required` column has a
+    value (not NaN / "NA"); only `carry` columns present in the snapshot are returned.
+    Hybrid scraping uses this to skip ad fetches for already-known ads.
+    """
+    required = list(required)
+    if prev is None or "Link" not in prev.columns or not set(required) <= set(prev.columns):
+        return {}
+    have = prev[required].notna().all(axis=1) & ~prev[required].astype(str).eq("NA").any(axis=1)
+    cols = [c for c in carry if c in prev.columns and c != "Link"]
+    rows = prev.loc[have, ["Link", *cols]].drop_duplicates(subset=["Link"])
+    return {r["Link"]: {c: r[c] for c in cols} for r in rows.to_dict("records")}
+
+# -------------------------------
+# Parquet snapshot store
+# -------------------------------
+DATE_COL         = "Datu iev."
+REGION_COL       = "Pilseta"
+CATEGORICAL_COLS = ["Pilseta", "Pilseta/Pagasts", "Ciems", "Zemes Tips", "Platiba Mervieniba"]
+NUMERIC_COLS     = ["Cena EUR", "Cena m2", "Platiba Daudzums", "Platiba m2", "Platiba ha"]
+
+def _require_pyarrow():
+    if not _HAS_PYARROW:
+        raise ImportError("Parquet snapshots need pyarrow. Run: pip install pyarrow")
+
+def typed_snapshot(df: pd.DataFrame) -> pd.DataFrame:
+    """Scraper output -> stable dtypes (floats for numerics, categoricals for locations/types)."""
+    df = df.copy()
+    for col in NUMERIC_COLS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    for col in CATEGORICAL_COLS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    if DATE_COL in df.columns:
+        df[DATE_COL] = df[DATE_COL].astype(str)
+    return df
+
+def write_snapshot(df: pd.DataFrame, root, by_region=False):
+    """
+    Write one run to the store at `root` (hive layout: Datu iev.=YYYY-MM-DD[/Pilseta=...]/).
+    Partitions for the run's date(s) are replaced, so same-day reruns do not duplicate rows.
+    """
+    _require_pyarrow()
+    if df.empty:
+        return
+    df = typed_snapshot(df)
+    partition_cols = [DATE_COL]
+    if by_region:
+        partition_cols.append(REGION_COL)
+        # null partition keys cannot be read back as one dictionary -> explicit "NA"
+        df[REGION_COL] = df[REGION_COL].astype(str).where(df[REGION_COL].notna(), "NA")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_to_dataset(table, root, partition_cols=partition_cols,
+                        existing_data_behavior="delete_matching")
+
+def snapshot_dates(root):
+    """Sorted scrape dates present in the store."""
+    if not os.path.isdir(root):
+        return []
+    prefix = DATE_COL + "="
+    return sorted(d[len(prefix):] for d in os.listdir(root) if d.startswith(prefix))
+
+def read_snapshots(root, start=None, end=None, columns=None, regions=None) -> pd.DataFrame:
+    """
+    Load snapshots with partition pruning and column pruning.
+    start/end: inclusive "YYYY-MM-DD" bounds on Datu iev.; regions: Pilseta values
+    (pruned by partition for stores written with by_region=True, row-filtered otherwise).
+    """
+    _require_pyarrow()
+    filters = []
+    if start:
+        filters.append((DATE_COL, ">=", start))
+    if end:
+        filters.append((DATE_COL, "<=", end))
+    if regions is not None:
+        filters.append((REGION_COL, "in", list(regions)))
+    return pd.read_parquet(root, columns=columns, filters=filters or None)